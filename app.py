@@ -1,134 +1,17 @@
 import flet as ft
 import threading
-import csv
-import random
-import time
-from datetime import datetime
-from backend import WhatsAppDriver 
-
-# --- FUNÇÃO AUXILIAR DE FORMATAÇÃO (Para Preview) ---
-def formatar_numero_preview(numero_raw):
-    nums = "".join([n for n in str(numero_raw) if n.isdigit()])
-    
-    # Se tiver 8 dígitos (Fixo), adiciona só o DDD 62
-    if len(nums) == 8:
-        nums = f"62{nums}"
-    
-    # Se tiver 9 dígitos (Celular), adiciona só o DDD 62
-    elif len(nums) == 9:
-        nums = f"62{nums}"
-        
-    # Adiciona o DDI 55
-    if len(nums) in [10, 11]: 
-        nums = f"55{nums}"
-        
-    return nums
-
-# --- THREAD DO ROBÔ ---
-class WhatsappBotThread(threading.Thread):
-    def __init__(self, csv_path, message_template, log_callback, progress_callback, on_finish_callback):
-        super().__init__()
-        self.csv_path = csv_path
-        self.message_template = message_template
-        self.log_callback = log_callback
-        self.progress_callback = progress_callback 
-        self.on_finish_callback = on_finish_callback
-        self.is_running = False
-        self.is_paused = False
-        self.stop_signal = False
-        self.driver_manager = WhatsAppDriver()
-
-    def run(self):
-        self.is_running = True
-        self.log_callback("🚀 Inicializando navegador...")
-        
-        try:
-            self.driver_manager.iniciar_driver()
-            self.log_callback("✅ Navegador aberto. Aguardando 30s (QR Code/Carregamento)...")
-            time.sleep(30)
-            
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            nome_relatorio = f"relatorio_envios_{timestamp}.csv"
-            
-            with open(self.csv_path, 'r', encoding='utf-8') as f_in, \
-                 open(nome_relatorio, 'w', encoding='utf-8', newline='') as f_out:
-                
-                leitor = csv.reader(f_in, delimiter=';')
-                escritor = csv.writer(f_out, delimiter=';')
-                escritor.writerow(["Telefone", "Nome", "Status", "Detalhes", "DataHora"])
-                
-                contatos = list(leitor)
-                total = len(contatos)
-                self.log_callback(f"📂 Lista carregada: {total} contatos.")
-
-                for i, linha in enumerate(contatos):
-                    if self.stop_signal:
-                        self.log_callback("🛑 Processo abortado.")
-                        break
-                    
-                    while self.is_paused:
-                        if self.stop_signal: break
-                        time.sleep(1)
-
-                    if not linha: continue
-                    
-                    numero = linha[0].strip()
-                    nome = linha[1].strip() if len(linha) > 1 else ""
-                    
-                    self.log_callback(f"🔄 ({i+1}/{total}) Enviando para: {numero}...")
-
-                    # Pausa longa a cada 50
-                    if (i + 1) % 50 == 0 and i < total - 1:
-                        tempo_pausa = random.randint(300, 600)
-                        minutos = tempo_pausa // 60
-                        self.log_callback(f"☕ Pausa de segurança: descansando por {minutos} min...")
-                        self.progress_callback(i, total, status=f"Em pausa ({minutos} min)...")
-                        for _ in range(tempo_pausa):
-                            if self.stop_signal: break
-                            time.sleep(1)
-
-                    # Envio
-                    eh_o_primeiro = (i == 0)
-                    sucesso, msg_status = self.driver_manager.enviar_mensagem(
-                        numero=numero,
-                        nome=nome,
-                        mensagem_base=self.message_template,
-                        primeiro_envio=eh_o_primeiro
-                    )
-                    
-                    hora_atual = datetime.now().strftime("%H:%M:%S")
-                    status_str = "SUCESSO" if sucesso else "FALHA"
-                    icon = "✅" if sucesso else "❌"
-                    
-                    self.log_callback(f"{icon} {numero}: {msg_status}")
-                    escritor.writerow([numero, nome, status_str, msg_status, hora_atual])
-                    f_out.flush()
-
-                    self.progress_callback(i + 1, total, status="Aguardando delay...")
-
-                    if i < total - 1:
-                        tempo_espera = random.uniform(15, 25)
-                        self.log_callback(f"⏳ Aguardando {tempo_espera:.1f}s...")
-                        time.sleep(tempo_espera)
-
-        except Exception as e:
-            self.log_callback(f"💀 Erro Crítico: {str(e)}")
-        finally:
-            self.log_callback("🏁 Processo finalizado.")
-            self.driver_manager.fechar()
-            self.is_running = False
-            self.on_finish_callback()
-
-    def pause(self):
-        self.is_paused = True
-        self.log_callback("⏸️ Pausado.")
-    def resume(self):
-        self.is_paused = False
-        self.log_callback("▶️ Retomado.")
-    def stop(self):
-        self.stop_signal = True
-        self.log_callback("⚠️ Parando...")
-
+from logs import AtualizadorUI, RegistroLog
+from template_mensagem import compilar_template, ErroTemplate
+from diario import ultimo_diario_pendente
+from robo import WhatsappBotThread
+from fila import FilaCampanhas, ItemFila, PENDENTE, RODANDO
+from importacao import detectar_formato, analisar
+from recursos import LIMITE_MEMORIA_MB, RECICLAR_A_CADA
+from telefones import DDD_PADRAO, DDI_PADRAO
+
+PREVIEW_POR_PAGINA = 50  # Linhas renderizadas por página na tabela de preview
+UI_ATUALIZACOES_POR_SEGUNDO = 4  # Limite de redesenhos de log/progresso
+PREVIEW_SEED = 0  # Semente do preview da mensagem (resultado reproduzível)
 
 # --- INTERFACE GRÁFICA ---
 def main(page: ft.Page):
@@ -141,24 +24,41 @@ def main(page: ft.Page):
 
     # --- FUNÇÕES DE UPDATE DA UI ---
 
-    def add_log(message):
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        log_text.value += f"[{timestamp}] {message}\n"
+    # Logs e progresso só marcam a tela como "suja"; o atualizador
+    # redesenha no máximo UI_ATUALIZACOES_POR_SEGUNDO vezes por segundo.
+    def flush_ui():
+        log_text.value = registro_log.texto()
         page.update()
 
+    atualizador_ui = AtualizadorUI(flush_ui, max_por_segundo=UI_ATUALIZACOES_POR_SEGUNDO)
+    registro_log = RegistroLog(atualizador_ui)
+
+    def add_log(message):
+        registro_log.adicionar(message)
+
     def update_progress_ui(current, total, status="Rodando"):
         percent = current / total if total > 0 else 0
         progress_bar.value = percent
         restantes = total - current
         progress_text.value = f"Processado: {current}/{total} | Restam: {restantes} | {int(percent*100)}%"
         status_indicator.value = f"Status atual: {status}"
-        page.update()
+        atualizador_ui.marcar()
+
+    def update_metrics_ui(resumo):
+        metricas_text.value = resumo
+        atualizador_ui.marcar()
+
+    def update_recursos_ui(texto):
+        recursos_text.value = texto
+        atualizador_ui.marcar()
 
     def on_bot_finish():
         add_log("--- FIM DA EXECUÇÃO ---")
         progress_bar.value = 0
         status_indicator.value = "Status: Parado"
         btn_start.disabled = False
+        btn_resume_campaign.disabled = False
+        btn_start_fila.disabled = False
         btn_pause.disabled = True
         btn_stop.disabled = True
         page.update()
@@ -180,6 +80,8 @@ def main(page: ft.Page):
     progress_bar = ft.ProgressBar(width=400, value=0, color=ft.Colors.GREEN)
     progress_text = ft.Text("0/0 (0%)", size=12, weight="bold")
     status_indicator = ft.Text("Status: Parado", size=12, color=ft.Colors.GREY_700)
+    metricas_text = ft.Text("", size=11, color=ft.Colors.GREY_700, font_family="monospace")
+    recursos_text = ft.Text("", size=11, color=ft.Colors.GREY_700, font_family="monospace")
 
     # 2. File Picker e Tabela de Preview
     file_picker = ft.FilePicker(on_result=lambda e: atualizar_arquivo(e))
@@ -199,51 +101,170 @@ def main(page: ft.Page):
         heading_row_color=ft.Colors.BLUE_50,
     )
 
+    # DDD/DDI usados quando o número vem incompleto
+    def config_numeros():
+        ddd = "".join(c for c in ddd_input.value if c.isdigit()) or DDD_PADRAO
+        ddi = "".join(c for c in ddi_input.value if c.isdigit()) or DDI_PADRAO
+        return ddd, ddi
+
+    def config_numeros_mudou(e):
+        # A normalização depende do DDD/DDI: refaz a análise do arquivo escolhido
+        if preview_arquivo:
+            iniciar_preview(preview_arquivo)
+
+    historico_checkbox = ft.Checkbox(label="Pular inválidos, opt-out e quem já recebeu (histórico)", value=True)
+    limpar_cache_checkbox = ft.Checkbox(label="Limpar cache do Chrome ao iniciar (mantém o login)", value=False)
+    bloquear_midia_checkbox = ft.Checkbox(label="Não carregar imagens e mídias (menos memória e banda)", value=False)
+    limite_memoria_input = ft.TextField(label="Reciclar Chrome acima de (MB)", value=str(LIMITE_MEMORIA_MB),
+                                        width=200, text_size=12, tooltip="0 = nunca")
+    reciclar_a_cada_input = ft.TextField(label="Reciclar a cada (contatos)", value=str(RECICLAR_A_CADA),
+                                         width=200, text_size=12, tooltip="0 = nunca")
+
+    # Limites da reciclagem do navegador (campo vazio = padrão)
+    def config_recursos():
+        def inteiro(campo, padrao):
+            digitos = "".join(c for c in campo.value if c.isdigit())
+            return int(digitos) if digitos else padrao
+        return inteiro(limite_memoria_input, LIMITE_MEMORIA_MB), inteiro(reciclar_a_cada_input, RECICLAR_A_CADA)
+
+    ddd_input = ft.TextField(label="DDD padrão", value=DDD_PADRAO, width=110, text_size=12, on_change=config_numeros_mudou)
+    ddi_input = ft.TextField(label="DDI padrão", value=DDI_PADRAO, width=110, text_size=12, on_change=config_numeros_mudou)
+
+    # Estado da pré-visualização: só guardamos tuplas (original, formatado, nome, válido),
+    # os controles são criados apenas para a página visível.
+    preview_linhas = []
+    preview_pagina = 0
+    preview_geracao = 0  # Invalida leituras antigas quando outro arquivo é escolhido
+    preview_arquivo = None
+    preview_importacao = None  # importacao.ResumoImportacao, reaproveitado pela thread
+    preview_campos_exemplo = {"nome": "Fulano"}
+
+    preview_resumo = ft.Text("", size=12, color=ft.Colors.GREY_700)
+    preview_formato = ft.Text("", size=12, color=ft.Colors.GREY_700, italic=True)
+    preview_pagina_text = ft.Text("", size=12)
+
+    def total_paginas():
+        return max(1, (len(preview_linhas) + PREVIEW_POR_PAGINA - 1) // PREVIEW_POR_PAGINA)
+
+    def renderizar_pagina():
+        inicio = preview_pagina * PREVIEW_POR_PAGINA
+        rows_view = []
+        for orig_num, fmt_num, orig_nome, valido in preview_linhas[inicio:inicio + PREVIEW_POR_PAGINA]:
+            cor = ft.Colors.BLUE if valido else ft.Colors.RED
+            rows_view.append(ft.DataRow(cells=[
+                ft.DataCell(ft.Text(orig_num)),
+                ft.DataCell(ft.Text(fmt_num, weight="bold", color=cor)),
+                ft.DataCell(ft.Text(orig_nome or "-")),
+            ]))
+        data_table.rows = rows_view
+        preview_pagina_text.value = f"Página {preview_pagina + 1}/{total_paginas()}"
+        btn_pagina_anterior.disabled = preview_pagina == 0
+        btn_pagina_proxima.disabled = preview_pagina >= total_paginas() - 1
+
+    def mudar_pagina(delta):
+        nonlocal preview_pagina
+        preview_pagina = min(max(preview_pagina + delta, 0), total_paginas() - 1)
+        renderizar_pagina()
+        page.update()
+
+    btn_pagina_anterior = ft.IconButton(icon=ft.Icons.CHEVRON_LEFT, on_click=lambda _: mudar_pagina(-1), disabled=True)
+    btn_pagina_proxima = ft.IconButton(icon=ft.Icons.CHEVRON_RIGHT, on_click=lambda _: mudar_pagina(1), disabled=True)
+
+    def carregar_preview(path, geracao, ddd, ddi):
+        """
+        Roda fora da thread de eventos: uma única passada pelo CSV (a mesma
+        importação usada pela thread) e a primeira página aparece assim que fica pronta.
+        """
+        nonlocal preview_linhas, preview_pagina, preview_importacao
+        linhas = []
+
+        def ao_ler(contato):
+            nonlocal preview_linhas, preview_pagina, preview_campos_exemplo
+            if not linhas:
+                preview_campos_exemplo = contato.campos
+            linhas.append((contato.numero, contato.normalizado, contato.nome, contato.valido))
+            # Primeira página disponível antes do fim da leitura
+            if len(linhas) == PREVIEW_POR_PAGINA:
+                preview_linhas = linhas
+                preview_pagina = 0
+                renderizar_pagina()
+                page.update()
+
+        try:
+            formato = detectar_formato(path)
+            preview_formato.value = f"Formato detectado: {formato.descricao()}"
+            resumo = analisar(path, ddd, ddi, formato, ao_ler=ao_ler, cancelado=lambda: geracao != preview_geracao)
+        except Exception as err:
+            if geracao != preview_geracao: return
+            add_log(f"❌ Erro ao ler CSV: {err}")
+            preview_linhas = []
+            data_table.rows = []
+            preview_resumo.value = ""
+            preview_formato.value = ""
+            page.update()
+            return
+
+        if resumo is None or geracao != preview_geracao: return
+
+        preview_importacao = resumo
+        preview_linhas = linhas
+        preview_pagina = min(preview_pagina, total_paginas() - 1)
+        renderizar_pagina()
+        preview_resumo.value = f"{resumo.total} contatos | {resumo.invalidos} números inválidos | {resumo.duplicados} repetidos"
+        add_log(f"✅ Pré-visualização gerada para {resumo.total} contatos ({resumo.invalidos} inválidos, {resumo.duplicados} repetidos).")
+        update_preview(None)
+
+    def iniciar_preview(path):
+        nonlocal preview_linhas, preview_pagina, preview_geracao, preview_importacao, preview_campos_exemplo
+        preview_geracao += 1
+        preview_linhas = []
+        preview_pagina = 0
+        preview_importacao = None
+        preview_campos_exemplo = {"nome": "Fulano"}
+        data_table.rows = []
+        preview_pagina_text.value = ""
+        preview_resumo.value = "Lendo arquivo..."
+        btn_pagina_anterior.disabled = True
+        btn_pagina_proxima.disabled = True
+
+        # Leitura em segundo plano para não travar a janela
+        ddd, ddi = config_numeros()
+        threading.Thread(target=carregar_preview, args=(path, preview_geracao, ddd, ddi), daemon=True).start()
+        page.update()
+
     def atualizar_arquivo(e: ft.FilePickerResultEvent):
+        nonlocal preview_arquivo, preview_geracao, preview_linhas, preview_importacao
         if e.files:
             path = e.files[0].path
+            preview_arquivo = path
             selected_file_text.value = path
             selected_file_text.color = ft.Colors.BLACK
             add_log(f"📂 Lendo CSV: {e.files[0].name}")
-            
-            # Lógica de Leitura e Preview
-            try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    leitor = csv.reader(f, delimiter=';')
-                    rows_view = []
-                    count = 0
-                    for row in leitor:
-                        if not row: continue
-                        count += 1
-                        # Dados originais
-                        orig_num = row[0]
-                        orig_nome = row[1] if len(row) > 1 else "-"
-                        
-                        # Formatação simulada
-                        fmt_num = formatar_numero_preview(orig_num)
-                        
-                        # Adiciona na tabela visual
-                        rows_view.append(ft.DataRow(cells=[
-                            ft.DataCell(ft.Text(orig_num)),
-                            ft.DataCell(ft.Text(fmt_num, weight="bold", color=ft.Colors.BLUE)),
-                            ft.DataCell(ft.Text(orig_nome)),
-                        ]))
-                    
-                    data_table.rows = rows_view
-                    add_log(f"✅ Pré-visualização gerada para {count} contatos.")
-            except Exception as err:
-                add_log(f"❌ Erro ao ler CSV: {err}")
-                data_table.rows = []
-
+            iniciar_preview(path)
         else:
-            selected_file_text.value = "Nenhum arquivo selecionado"
+            preview_geracao += 1
+            preview_arquivo = None
+            preview_linhas = []
+            preview_importacao = None
             data_table.rows = []
-        
-        page.update()
+            selected_file_text.value = "Nenhum arquivo selecionado"
+            preview_resumo.value = ""
+            preview_formato.value = ""
+            page.update()
+
+    def campos_disponiveis():
+        """Placeholders válidos: colunas do CSV carregado (ou qualquer um, sem arquivo)."""
+        return preview_importacao.formato.campos if preview_importacao else None
 
     # 3. Input Mensagem e Ajuda (RESTAURADA)
     def update_preview(e):
-        markdown_preview.value = message_input.value
+        # Renderização com semente fixa: o preview não "pula" a cada tecla
+        try:
+            # Campos do primeiro contato do CSV (ou "Fulano" sem arquivo)
+            template = compilar_template(message_input.value, campos_validos=campos_disponiveis())
+            markdown_preview.value = template.renderizar(preview_campos_exemplo, seed=PREVIEW_SEED)
+        except ErroTemplate as err:
+            markdown_preview.value = f"⚠️ {err}"
         page.update()
 
     message_input = ft.TextField(
@@ -259,8 +280,10 @@ def main(page: ft.Page):
         content=ft.Column([
             ft.Text("ℹ️ Comandos Disponíveis na Mensagem:", weight="bold", size=14),
             ft.Text("• {nome} : Substitui pelo nome do contato (se houver no CSV).", size=12),
+            ft.Text("• {cidade}, {empresa}... : Qualquer outra coluna do CSV (nome do cabeçalho, sem acento).", size=12),
             ft.Text("• {texto1|texto2} : Escolhe aleatoriamente uma das opções (Spintax).", size=12),
             ft.Text("  Exemplo: \"{Olá|Oi} {nome}, {tudo bem?|como vai?}\"", size=12, italic=True, color=ft.Colors.BLUE_GREY),
+            ft.Text("• {Oi|{Olá|E aí}} : Opções podem ser aninhadas.", size=12),
             ft.Text("• *Negrito*, _Itálico_, ~Riscado~ : Formatação padrão do WhatsApp.", size=12),
         ], spacing=2),
         padding=10,
@@ -276,25 +299,142 @@ def main(page: ft.Page):
     )
 
     # 4. Botões
-    def start_click(e):
-        nonlocal bot_thread
+    def opcoes_campanha():
+        """Parâmetros da tela repassados a cada WhatsappBotThread (também às da fila)."""
+        limite_memoria, reciclar_a_cada = config_recursos()
+        ddd, ddi = config_numeros()
+        return dict(
+            log_callback=add_log,
+            progress_callback=update_progress_ui,
+            metrics_callback=update_metrics_ui,
+            ddd_padrao=ddd,
+            ddi_padrao=ddi,
+            usar_historico=historico_checkbox.value,
+            limpar_cache_perfil=limpar_cache_checkbox.value,
+            bloquear_midia=bloquear_midia_checkbox.value,
+            limite_memoria_mb=limite_memoria,
+            reciclar_a_cada=reciclar_a_cada,
+            recursos_callback=update_recursos_ui,
+        )
+
+    def validar_campanha():
+        """CSV e mensagem atuais prontos para envio (mensagens de erro vão para o log)."""
         if "Nenhum" in selected_file_text.value:
             add_log("❌ Selecione um CSV primeiro.")
-            return
+            return False
         if not message_input.value.strip():
             add_log("❌ Digite uma mensagem.")
-            return
-
+            return False
+        try:
+            template = compilar_template(message_input.value, campos_validos=campos_disponiveis())
+        except ErroTemplate as err:
+            add_log(f"❌ Mensagem inválida: {err}")
+            return False
+        if template.campos_como_texto:
+            nomes = ", ".join(f"{{{nome}}}" for nome in template.campos_como_texto)
+            add_log(f"⚠️ Não são colunas do CSV e serão enviados como texto: {nomes}")
+        return True
+
+    def controles_rodando():
         btn_start.disabled = True
+        btn_resume_campaign.disabled = True
+        btn_start_fila.disabled = True
         btn_pause.disabled = False
         btn_stop.disabled = False
-        
+
+    def start_click(e):
+        nonlocal bot_thread
+        if not validar_campanha():
+            return
+
+        controles_rodando()
         bot_thread = WhatsappBotThread(
             csv_path=selected_file_text.value,
             message_template=message_input.value,
-            log_callback=add_log,
-            progress_callback=update_progress_ui,
-            on_finish_callback=on_bot_finish
+            on_finish_callback=on_bot_finish,
+            resumo_importacao=preview_importacao,
+            **opcoes_campanha(),
+        )
+        bot_thread.start()
+        page.update()
+
+    def resume_campaign_click(e):
+        nonlocal bot_thread
+        if bot_thread and bot_thread.is_running:
+            return
+        diario = ultimo_diario_pendente()
+        if not diario:
+            add_log("ℹ️ Nenhuma campanha interrompida para retomar.")
+            return
+
+        controles_rodando()
+        # CSV, mensagem e DDD/DDI vêm do diário da campanha original
+        bot_thread = WhatsappBotThread(
+            csv_path=diario.cabecalho["csv"],
+            message_template=diario.cabecalho["mensagem"],
+            on_finish_callback=on_bot_finish,
+            diario_retomar=diario,
+            **opcoes_campanha(),
+        )
+        bot_thread.start()
+        page.update()
+
+    # Fila de campanhas: várias listas no mesmo navegador (fila.FilaCampanhas).
+    # Antes de iniciar, os itens ficam em `itens_fila`; durante a execução, na própria fila.
+    itens_fila = []
+    fila_view = ft.Column(spacing=0)
+
+    def fila_rodando():
+        return isinstance(bot_thread, FilaCampanhas) and bot_thread.is_alive()
+
+    def renderizar_fila(itens):
+        linhas = []
+        for item in itens:
+            removivel = item.status in (PENDENTE, RODANDO)
+            linhas.append(ft.Row([
+                ft.Text(item.descricao(), size=12, expand=True,
+                        tooltip=item.detalhes or None),
+                ft.IconButton(icon=ft.Icons.DELETE_OUTLINE, icon_size=16, visible=removivel,
+                              tooltip="Remover da fila (para a campanha se estiver rodando)",
+                              on_click=lambda _, item_id=item.id: remover_da_fila(item_id)),
+            ]))
+        fila_view.controls = linhas
+        atualizador_ui.marcar()
+
+    def adicionar_fila_click(e):
+        if not validar_campanha():
+            return
+        if fila_rodando():
+            bot_thread.adicionar(selected_file_text.value, message_input.value, preview_importacao)
+        else:
+            itens_fila.append(ItemFila(selected_file_text.value, message_input.value, preview_importacao))
+            add_log(f"➕ Fila: {itens_fila[-1].descricao()}")
+            renderizar_fila(itens_fila)
+
+    def remover_da_fila(item_id):
+        nonlocal itens_fila
+        if fila_rodando():
+            bot_thread.remover(item_id)
+        else:
+            itens_fila = [i for i in itens_fila if i.id != item_id]
+            renderizar_fila(itens_fila)
+
+    def start_fila_click(e):
+        nonlocal bot_thread, itens_fila
+        if bot_thread and bot_thread.is_running:
+            return
+        pendentes = [i for i in itens_fila if i.status == PENDENTE]
+        if not pendentes:
+            add_log("ℹ️ Fila vazia: adicione CSV + mensagem com 'Adicionar à fila'.")
+            return
+
+        controles_rodando()
+        itens_fila = []
+        bot_thread = FilaCampanhas(
+            itens=pendentes,
+            on_finish_callback=on_bot_finish,
+            fila_callback=renderizar_fila,
+            **opcoes_campanha(),
         )
         bot_thread.start()
         page.update()
@@ -323,6 +463,12 @@ def main(page: ft.Page):
     btn_start = ft.ElevatedButton("INICIAR DISPAROS", icon=ft.Icons.ROCKET_LAUNCH, 
                                   on_click=start_click, bgcolor=ft.Colors.GREEN, color=ft.Colors.WHITE)
     btn_pause = ft.ElevatedButton("Pausar", icon=ft.Icons.PAUSE, on_click=pause_click, disabled=True)
+    btn_resume_campaign = ft.ElevatedButton("Retomar campanha", icon=ft.Icons.RESTORE, on_click=resume_campaign_click,
+                                            tooltip="Continua a última campanha interrompida de onde parou")
+    btn_add_fila = ft.ElevatedButton("Adicionar à fila", icon=ft.Icons.PLAYLIST_ADD, on_click=adicionar_fila_click,
+                                     tooltip="CSV e mensagem atuais viram uma campanha da fila (também durante a execução)")
+    btn_start_fila = ft.ElevatedButton("Iniciar fila", icon=ft.Icons.QUEUE_PLAY_NEXT, on_click=start_fila_click,
+                                       tooltip="Roda as campanhas da fila em sequência, no mesmo navegador")
     btn_stop = ft.ElevatedButton("PARAR", icon=ft.Icons.STOP, on_click=stop_click, disabled=True, bgcolor=ft.Colors.RED_100, color=ft.Colors.RED)
 
     # --- LAYOUT PRINCIPAL (SEM NUMERAÇÃO) ---
@@ -336,15 +482,28 @@ def main(page: ft.Page):
                     ft.Text("Configurações & Logs", size=18, weight="bold"),
                     btn_file,
                     selected_file_text,
+                    ft.Row([ddd_input, ddi_input]),
+                    historico_checkbox,
+                    limpar_cache_checkbox,
+                    bloquear_midia_checkbox,
+                    ft.Row([limite_memoria_input, reciclar_a_cada_input]),
                     ft.Divider(),
                     
                     ft.Text("Controles", size=16),
                     ft.Row([btn_start, btn_pause, btn_stop], alignment=ft.MainAxisAlignment.CENTER),
+                    ft.Row([btn_resume_campaign], alignment=ft.MainAxisAlignment.CENTER),
+                    ft.Divider(),
+
+                    ft.Text("Fila de campanhas", size=16),
+                    ft.Row([btn_add_fila, btn_start_fila], alignment=ft.MainAxisAlignment.CENTER),
+                    fila_view,
                     ft.Divider(),
 
                     status_indicator,
                     progress_text,
                     progress_bar,
+                    metricas_text,
+                    recursos_text,
                     ft.Divider(),
                     
                     ft.Text("Log de Execução:", weight="bold"),
@@ -375,7 +534,7 @@ def main(page: ft.Page):
                     
                     # Seção Dados (Nova)
                     ft.Text("Pré-visualização da Lista (Dados Formatados)", size=18, weight="bold"),
-                    ft.Text("Verifique se os números formatados estão com DDI+DDD+NUMERO (ex: 55629...)", size=12, color=ft.Colors.GREY),
+                    ft.Text("Verifique se os números formatados estão com DDI+DDD+NUMERO (ex: 55629...). Repetidos não são enviados.", size=12, color=ft.Colors.GREY),
                     
                     # Container com scroll apenas para a tabela
                     ft.Container(
@@ -383,7 +542,10 @@ def main(page: ft.Page):
                         height=300, # Altura fixa para a tabela ter scroll próprio
                         border=ft.border.all(1, ft.Colors.GREY_300),
                         border_radius=5,
-                    )
+                    ),
+                    ft.Row([btn_pagina_anterior, preview_pagina_text, btn_pagina_proxima, preview_resumo],
+                           vertical_alignment=ft.CrossAxisAlignment.CENTER),
+                    preview_formato,
                 ], 
                 alignment=ft.MainAxisAlignment.START, # FIXA NO TOPO
                 scroll=ft.ScrollMode.AUTO
@@ -1,45 +1,113 @@
 import time
 import random
 import os
-import urllib.parse
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import (
+    SessionNotCreatedException, StaleElementReferenceException, TimeoutException, InvalidSessionIdException,
+    NoSuchWindowException, ElementNotInteractableException, ElementClickInterceptedException, WebDriverException,
+)
+from urllib3.exceptions import HTTPError as ErroConexaoDriver
 from selenium.webdriver.chrome.service import Service
+from metricas import MetricasCampanha
+from controle import SinalControle, OperacaoCancelada
+from navegador import TEMPO_MAXIMO_CARREGAMENTO, PERFIL_CHROME, resolver_chromedriver, esquecer_chromedriver, limpar_cache_perfil
+from telefones import normalizar_numero, DDD_PADRAO, DDI_PADRAO
+from falhas import ResultadoEnvio, ENVIADO, NUMERO_INVALIDO, TRANSITORIA, NAVEGADOR_CAIU, DESCONHECIDA, resumo_erro
+
+# Elementos que indicam o estado do WhatsApp Web após o carregamento
+SELETOR_LISTA_CONVERSAS = (By.CSS_SELECTOR, "#pane-side")  # Logado, app pronto
+SELETOR_QR_CODE = (By.CSS_SELECTOR, "div[data-ref] canvas, canvas[aria-label]")  # Aguardando leitura do QR
+
+# Caixa de texto da conversa aberta (pronta para digitar)
+SELETOR_CAIXA_TEXTO = (By.XPATH, '//*[@id="main"]/footer//div[@contenteditable="true"]')
+SELETOR_CAIXA_TEXTO_ALTERNATIVO = (By.CSS_SELECTOR, "div[role='textbox']")
+
+# Marcadores de erro ao abrir a conversa, pela estrutura da página (não pelo texto),
+# então funcionam em qualquer idioma do WhatsApp Web. (condição, tipo de falha, motivo)
+# A condição vale para um diálogo visível com pelo menos um botão (o popup de
+# "Iniciando conversa..." não tem botão: a espera continua):
+# - "dialogo": seletor do diálogo;
+# - "corpo": seletor que precisa existir dentro dele;
+# - "botoes": quantidade exata de botões;
+# - "ausente": seletor que não pode existir na página.
+# O primeiro marcador que casar decide; se o WhatsApp Web mudar o DOM, basta ajustar esta tabela.
+SELETOR_DIALOGO = (By.CSS_SELECTOR, 'div[data-animate-modal-popup="true"], div[role="dialog"]')
+SELETOR_DIALOGO_BOTAO = (By.CSS_SELECTOR, 'button')
+MARCADORES_ERRO_CONVERSA = [
+    # Número inválido: corpo de texto, um único botão ("OK") e nenhuma conversa (#main) por trás
+    ({"dialogo": SELETOR_DIALOGO, "corpo": (By.CSS_SELECTOR, 'div[data-animate-modal-body="true"]'),
+      "botoes": 1, "ausente": (By.ID, "main")},
+     NUMERO_INVALIDO, "Número inválido/não tem WhatsApp"),
+    # Qualquer outro diálogo ("Usar aqui", atualização...): não é sobre o número, vai para a repescagem
+    ({"dialogo": SELETOR_DIALOGO}, TRANSITORIA, "Diálogo inesperado do WhatsApp Web"),
+]
+
+TEMPO_MAXIMO_CONVERSA = 20  # Segundos para a conversa abrir (ou o erro aparecer)
+
+# Com `bloquear_midia`: fotos, figurinhas, vídeos e áudios das conversas e fotos de perfil
+# não são baixados (menos memória e banda; o envio de texto não depende deles)
+URLS_MIDIA_BLOQUEADAS = ["*mmg.whatsapp.net/*", "*.cdn.whatsapp.net/*", "*pps.whatsapp.net/*"]
+
+# Trechos da mensagem do WebDriverException quando o Chrome/aba morreu
+MARCADORES_QUEDA = ("chrome not reachable", "disconnected", "session deleted", "no such window",
+                    "target window already closed", "invalid session id", "tab crashed", "target crashed")
+
+
+def classificar_excecao(erro):
+    """Tipo de falha (ver falhas.py) para uma exceção levantada durante o envio."""
+    if isinstance(erro, (InvalidSessionIdException, NoSuchWindowException, ConnectionError, ErroConexaoDriver)):
+        # Sessão/janela perdida ou chromedriver fora do ar (conexão recusada)
+        return NAVEGADOR_CAIU
+    if isinstance(erro, (TimeoutException, StaleElementReferenceException,
+                         ElementNotInteractableException, ElementClickInterceptedException)):
+        return TRANSITORIA
+    if isinstance(erro, WebDriverException) and any(m in str(erro).lower() for m in MARCADORES_QUEDA):
+        return NAVEGADOR_CAIU
+    return DESCONHECIDA
+
 
 class WhatsAppDriver:
-    def __init__(self):
+    def __init__(self, ddd_padrao=DDD_PADRAO, ddi_padrao=DDI_PADRAO,
+                 chromedriver_path=None, permitir_download=True, limpar_cache=False, controle=None,
+                 metricas=None, bloquear_midia=False, headless=False):
         self.driver = None
+        # Tempo de cada etapa do envio (ver metricas.ETAPAS_ENVIO)
+        self.metricas = metricas or MetricasCampanha()
+        # Token de cancelamento: toda espera do driver acorda na hora do PARAR
+        self.controle = controle or SinalControle()
         self.wait = None
-    
-    def resolver_spintax(self, texto):
-        import re
-        import random
-        # Regex para encontrar conteúdo dentro de {}
-        padrao = r'\{([^{}]+)\}'
-        
-        def substituir(match):
-            conteudo = match.group(1)
-            # CORREÇÃO: Aceita tanto pipe "|" quanto barra "/" como separador
-            if '|' in conteudo:
-                opcoes = conteudo.split('|')
-            elif '/' in conteudo:
-                opcoes = conteudo.split('/')
-            else:
-                opcoes = [conteudo] # Caso não tenha separador, retorna o próprio texto
-            
-            return random.choice(opcoes).strip()
-        
-        return re.sub(padrao, substituir, texto)
+        self.ddd_padrao = ddd_padrao
+        self.ddi_padrao = ddi_padrao
+        self.chromedriver_path = chromedriver_path
+        self.permitir_download = permitir_download
+        self.limpar_cache = limpar_cache
+        self.bloquear_midia = bloquear_midia
+        # Sem janela (servidor sem tela); o login pelo QR precisa ter sido feito antes no mesmo perfil
+        self.headless = headless
+        # Duração de cada etapa da última inicialização (segundos), para o log
+        self.tempos_inicializacao = {}
+        self.origem_chromedriver = None
+        self.bytes_cache_liberados = 0
+
+    def _medir(self, etapa, inicio):
+        self.tempos_inicializacao[etapa] = time.monotonic() - inicio
 
     def iniciar_driver(self):
-        options = Options()
+        self.tempos_inicializacao = {}
         dir_path = os.getcwd()
-        profile_path = os.path.join(dir_path, "chrome_profile")
+        profile_path = os.path.join(dir_path, PERFIL_CHROME)
+
+        if self.limpar_cache:
+            inicio = time.monotonic()
+            self.bytes_cache_liberados = limpar_cache_perfil(profile_path)
+            self._medir("limpeza do perfil", inicio)
+
+        options = Options()
         options.add_argument(f"user-data-dir={profile_path}")
         
         # --- NOVAS FLAGS ANTI-BLOQUEIO ---
@@ -51,44 +119,80 @@ class WhatsAppDriver:
         # User-Agent de navegador real (simula um Chrome normal de usuário)
         options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
         
-        options.add_argument("--start-maximized")
+        if self.headless:
+            options.add_argument("--headless=new")
+            options.add_argument("--window-size=1366,900")
+        else:
+            options.add_argument("--start-maximized")
         options.add_argument("--disable-infobars")
         options.add_argument("--disable-extensions")
+
+        if self.bloquear_midia:
+            # Imagens desligadas e vídeo/áudio sem autoplay
+            options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+            options.add_argument("--autoplay-policy=user-gesture-required")
         
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=options)
+        inicio = time.monotonic()
+        caminho_driver, self.origem_chromedriver = resolver_chromedriver(self.chromedriver_path, self.permitir_download)
+        self._medir("chromedriver", inicio)
+
+        inicio = time.monotonic()
+        try:
+            self.driver = webdriver.Chrome(service=Service(caminho_driver), options=options)
+        except SessionNotCreatedException:
+            # Driver em cache incompatível com o Chrome atualizado: baixa de novo uma vez
+            if self.origem_chromedriver != "cache" or not self.permitir_download:
+                raise
+            esquecer_chromedriver()
+            caminho_driver, self.origem_chromedriver = resolver_chromedriver(self.chromedriver_path, self.permitir_download)
+            self.driver = webdriver.Chrome(service=Service(caminho_driver), options=options)
+        self._medir("abrir Chrome", inicio)
         
         # Truque extra para remover a propriedade 'webdriver' do navegador via JavaScript
         self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+
+        if self.bloquear_midia:
+            # Downloads de mídia cortados na rede, antes de chegar ao app
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": URLS_MIDIA_BLOQUEADAS})
         
         self.wait = WebDriverWait(self.driver, 20)
         
+        inicio = time.monotonic()
         self.driver.get("https://web.whatsapp.com")
+        self._medir("abrir WhatsApp Web", inicio)
         return self.driver
 
+    def aguardar_whatsapp_pronto(self, tempo_maximo=TEMPO_MAXIMO_CARREGAMENTO, ao_mostrar_qr=None):
+        """
+        Espera a lista de conversas aparecer (sessão logada e app carregado).
+        Se o QR Code aparecer antes, chama `ao_mostrar_qr()` uma vez e continua
+        esperando a leitura. Retorna "sessao" (já estava logado) ou "qr"
+        (precisou escanear); lança TimeoutException após `tempo_maximo` segundos.
+        """
+        qr_visto = False
+
+        def estado(driver):
+            nonlocal qr_visto
+            self.controle.checar()
+            if driver.find_elements(*SELETOR_LISTA_CONVERSAS):
+                return True
+            if not qr_visto and driver.find_elements(*SELETOR_QR_CODE):
+                qr_visto = True
+                if ao_mostrar_qr:
+                    ao_mostrar_qr()
+            return False
+
+        WebDriverWait(self.driver, tempo_maximo, poll_frequency=0.5).until(
+            estado, message=f"WhatsApp Web não carregou em {tempo_maximo}s"
+        )
+        return "qr" if qr_visto else "sessao"
+
     def formatar_numero(self, numero_raw):
         """
-        Limpa o número e garante o formato 55 + DDD + Numero.
-        Não insere o dígito 9, apenas o DDD 62 se estiver faltando.
+        Garante o formato DDI + DDD + Numero (ver telefones.normalizar_numero).
         """
-        # Remove caracteres não numéricos
-        nums = "".join([n for n in str(numero_raw) if n.isdigit()])
-        
-        # Lógica de Auto-completar DDD (Assume 62 se vier sem)
-        
-        # Caso 1: Tem 8 dígitos (Fixo ou Celular antigo sem DDD) -> Vira 62 + 8 dígitos
-        if len(nums) == 8:
-            nums = f"62{nums}"
-            
-        # Caso 2: Tem 9 dígitos (Celular sem DDD) -> Vira 62 + 9 dígitos
-        elif len(nums) == 9:
-            nums = f"62{nums}"
-            
-        # Adiciona o DDI do Brasil (55) se o número tiver 10 (Fixo+DDD) ou 11 (Cel+DDD) dígitos
-        if len(nums) in [10, 11]: 
-            nums = f"55{nums}"
-            
-        return nums
+        return normalizar_numero(numero_raw, self.ddd_padrao, self.ddi_padrao)
 
     def digitar_como_humano(self, elemento, texto):
         """
@@ -97,68 +201,129 @@ class WhatsAppDriver:
         for char in texto:
             elemento.send_keys(char)
             # Delay aleatório entre 0.05 e 0.2 segundos por letra
-            time.sleep(random.uniform(0.05, 0.2))
+            self.controle.dormir(random.uniform(0.05, 0.2))
+
+    def aguardar_conversa(self, tempo_maximo=TEMPO_MAXIMO_CONVERSA):
+        """
+        Corrida entre "caixa de texto clicável" e os diálogos do WhatsApp (ver classificar_dialogo).
+        Retorna ("caixa", elemento) ou ("erro", (tipo de falha, motivo)) assim que um deles aparece;
+        lança TimeoutException se nenhum aparecer em `tempo_maximo` segundos.
+        """
+        caixa_clicavel = EC.element_to_be_clickable(SELETOR_CAIXA_TEXTO)
+
+        def caixa_ou_erro(driver):
+            self.controle.checar()
+            caixa = caixa_clicavel(driver)
+            if caixa:
+                return "caixa", caixa
+            falha = self.classificar_dialogo(driver)
+            return ("erro", falha) if falha else False
+
+        return WebDriverWait(
+            self.driver, tempo_maximo, poll_frequency=0.25,
+            ignored_exceptions=(StaleElementReferenceException,)
+        ).until(caixa_ou_erro)
+
+    @staticmethod
+    def classificar_dialogo(driver):
+        """
+        (tipo de falha, motivo) do primeiro MARCADORES_ERRO_CONVERSA que casar com um
+        diálogo visível; False enquanto não há diálogo com botão.
+        """
+        for condicao, tipo, motivo in MARCADORES_ERRO_CONVERSA:
+            if condicao.get("ausente") and driver.find_elements(*condicao["ausente"]):
+                continue
+            for dialogo in driver.find_elements(*condicao["dialogo"]):
+                if not dialogo.is_displayed():
+                    continue
+                botoes = dialogo.find_elements(*SELETOR_DIALOGO_BOTAO)
+                if not botoes or ("botoes" in condicao and len(botoes) != condicao["botoes"]):
+                    continue
+                if condicao.get("corpo") and not dialogo.find_elements(*condicao["corpo"]):
+                    continue
+                return tipo, motivo
+        return False
 
-    def enviar_mensagem(self, numero, nome, mensagem_base, primeiro_envio=False):
+    def enviar_mensagem(self, numero, mensagem_final):
+        """
+        Envia `mensagem_final` já renderizada (ver template_mensagem.Template).
+        Retorna falhas.ResultadoEnvio: o tipo diz se vale tentar de novo ou reabrir o navegador.
+        """
         try:
             numero_formatado = self.formatar_numero(numero)
             
-            # Prepara a mensagem
-            msg_com_nome = mensagem_base.replace("{nome}", nome if nome else "")
-            mensagem_final = self.resolver_spintax(msg_com_nome)
-            
             # --- MUDANÇA CRUCIAL: NÃO ENVIAR TEXTO PELA URL ---
             # Removemos o &text=... para obrigar o robô a digitar
             link = f"https://web.whatsapp.com/send?phone={numero_formatado}"
             
-            self.driver.get(link)
+            with self.metricas.etapa("navegacao"):
+                self.driver.get(link)
             
-            tempo_limite = 60 if primeiro_envio else 20
-            wait_local = WebDriverWait(self.driver, tempo_limite)
-
-            try:
-                # Espera a caixa de texto aparecer e ser clicável
-                caixa_texto = wait_local.until(EC.element_to_be_clickable(
-                    (By.XPATH, '//*[@id="main"]/footer//div[@contenteditable="true"]')
-                ))
-            except:
-                time.sleep(2)
-                # Verifica erro de número inválido
-                if "número de telefone compartilhado através de url é inválido" in self.driver.page_source.lower():
-                    return False, "Número inválido/não tem WhatsApp"
-                # Tenta um seletor alternativo (às vezes o WhatsApp muda o DOM)
+            with self.metricas.etapa("abrir_conversa"):
                 try:
-                    caixa_texto = self.driver.find_element(By.CSS_SELECTOR, "div[role='textbox']")
-                except:
-                    return False, "Timeout: Caixa de texto não encontrada"
+                    # Uma única espera: o que aparecer primeiro, caixa de texto ou erro
+                    tipo, valor = self.aguardar_conversa()
+                except OperacaoCancelada:
+                    raise
+                except Exception as e:
+                    if classificar_excecao(e) == NAVEGADOR_CAIU:
+                        raise
+                    # Tenta um seletor alternativo (às vezes o WhatsApp muda o DOM)
+                    try:
+                        tipo, valor = "caixa", self.driver.find_element(*SELETOR_CAIXA_TEXTO_ALTERNATIVO)
+                    except Exception:
+                        return ResultadoEnvio(False, "Timeout: Caixa de texto não encontrada", TRANSITORIA)
+
+            if tipo == "erro":
+                tipo_falha, motivo = valor
+                return ResultadoEnvio(False, motivo, tipo_falha)
+            caixa_texto = valor
 
             # Delay humano antes de começar a digitar ("Lendo a conversa anterior")
-            time.sleep(random.uniform(1.5, 3))
+            with self.metricas.etapa("leitura"):
+                self.controle.dormir(random.uniform(1.5, 3))
             
-            # Clica para focar
-            caixa_texto.click()
+            with self.metricas.etapa("digitacao"):
+                # Clica para focar
+                caixa_texto.click()
+                
+                # --- DIGITAÇÃO HUMANIZADA ---
+                # Usa sua função existente para digitar caractere por caractere
+                # Isso simula o evento de teclado real (keydown/keyup)
+                self.digitar_como_humano(caixa_texto, mensagem_final)
             
-            # --- DIGITAÇÃO HUMANIZADA ---
-            # Usa sua função existente para digitar caractere por caractere
-            # Isso simula o evento de teclado real (keydown/keyup)
-            self.digitar_como_humano(caixa_texto, mensagem_final)
+            with self.metricas.etapa("pos_envio"):
+                # Delay "conferindo o que escreveu" antes de enviar
+                self.controle.dormir(random.uniform(0.5, 1.5))
+                
+                # Envio
+                caixa_texto.send_keys(Keys.ENTER)
+                
+                # Tempo pós envio. Depois do ENTER a mensagem já saiu: PARAR só encurta a espera
+                # (esperar, não dormir), e o envio é registrado como sucesso antes de a campanha parar
+                tempo_pos_envio = random.uniform(3, 6)
+                self.controle.esperar(tempo_pos_envio)
             
-            # Delay "conferindo o que escreveu" antes de enviar
-            time.sleep(random.uniform(0.5, 1.5))
-            
-            # Envio
-            caixa_texto.send_keys(Keys.ENTER)
-            
-            # Tempo pós envio
-            tempo_pos_envio = 10 if primeiro_envio else random.uniform(3, 6)
-            time.sleep(tempo_pos_envio)
-            
-            return True, "Enviado com sucesso (Digitado)"
+            return ResultadoEnvio(True, "Enviado com sucesso (Digitado)", ENVIADO)
 
+        except OperacaoCancelada:
+            raise
         except Exception as e:
             print(f"Erro detalhado: {e}") # Ajuda no debug
-            return False, f"Erro crítico: {str(e)}"
+            tipo_falha = classificar_excecao(e)
+            prefixo = {NAVEGADOR_CAIU: "Navegador caiu", TRANSITORIA: "Falha temporária"}.get(tipo_falha, "Erro crítico")
+            return ResultadoEnvio(False, f"{prefixo}: {resumo_erro(e)}", tipo_falha)
         
+    def pid_navegador(self):
+        """PID do chromedriver (o Chrome roda abaixo dele), para o recursos.MonitorRecursos."""
+        try:
+            return self.driver.service.process.pid if self.driver else None
+        except AttributeError:
+            return None
+
     def fechar(self):
         if self.driver:
-            self.driver.quit()
\ No newline at end of file
+            try:
+                self.driver.quit()
+            finally:
+                self.driver = None
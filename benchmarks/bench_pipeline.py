@@ -0,0 +1,186 @@
+"""
+Benchmark offline do próprio app (sem Chrome, sem rede, sem espera entre envios).
+
+Mede o custo de cada estágio para listas de 10 mil, 100 mil e 1 milhão de contatos:
+leitura do CSV, normalização, renderização da mensagem, log/atualização da UI,
+escrita do relatório e a campanha completa com o driver_falso.DriverFalso.
+
+Uso (na raiz do projeto):
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --tamanhos 10000 100000 --json resultado.json
+"""
+import os
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from robo import WhatsappBotThread, COLUNAS_RELATORIO
+from importacao import contar_contatos, ler_contatos
+from driver_falso import DriverFalso
+from logs import AtualizadorUI, RegistroLog
+from metricas import MetricasCampanha
+from telefones import normalizar_lote, IndiceNumeros
+from template_mensagem import compilar_template
+
+TAMANHOS_PADRAO = [10_000, 100_000, 1_000_000]
+PIPELINE_MAXIMO = 100_000  # A campanha completa grava diário com fsync por contato
+MENSAGEM = "{Olá|Oi|{E aí|Fala}} {nome}, {tudo bem?|como vai?} Temos novidades para {cidade}!"
+
+
+def gerar_csv(caminho, quantidade, seed=0):
+    rng = random.Random(seed)
+    nomes = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio", "Gabi", "Hugo"]
+    with open(caminho, 'w', encoding='utf-8', newline='') as f:
+        escritor = csv.writer(f, delimiter=';')
+        for _ in range(quantidade):
+            # Formatos variados e ~2% de repetidos, como numa lista real
+            numero = f"629{rng.randrange(10**7, 10**8)}" if rng.random() > 0.02 else "62999999999"
+            if rng.random() < 0.3:
+                numero = f"({numero[:2]}) {numero[2:7]}-{numero[7:]}"
+            escritor.writerow([numero, rng.choice(nomes)])
+
+
+def medir(funcao):
+    inicio = time.perf_counter()
+    retorno = funcao()
+    return time.perf_counter() - inicio, retorno
+
+
+def bench_ingestao(caminho):
+    def rodar():
+        total, _ = contar_contatos(caminho)
+        lidos = sum(1 for _ in ler_contatos(caminho, indice=IndiceNumeros()))
+        return total, lidos
+    return medir(rodar)
+
+
+def bench_normalizacao(caminho):
+    with open(caminho, 'r', encoding='utf-8', newline='') as f:
+        coluna = [linha[0] for linha in csv.reader(f, delimiter=';') if linha]
+
+    def rodar():
+        indice = IndiceNumeros()
+        for numero in normalizar_lote(coluna):
+            indice.registrar(numero)
+        return indice.duplicados
+    return medir(rodar)
+
+
+def bench_template(quantidade):
+    template = compilar_template(MENSAGEM)
+    rng = random.Random(0)
+    campos = {"nome": "Ana", "cidade": "Goiânia"}
+
+    def rodar():
+        for _ in range(quantidade):
+            template.renderizar(campos, rng=rng)
+    return medir(rodar)
+
+
+def bench_logs(quantidade, pasta):
+    flushes = 0
+
+    def flush():
+        nonlocal flushes
+        flushes += 1
+        registro.texto()  # O mesmo trabalho que a tela faz a cada redesenho
+
+    atualizador = AtualizadorUI(flush, max_por_segundo=4)
+    registro = RegistroLog(atualizador, log_dir=pasta)
+
+    def rodar():
+        for i in range(quantidade):
+            registro.adicionar(f"🔄 ({i + 1}/{quantidade}) Enviando para: 62999999999...")
+            registro.adicionar("✅ 62999999999: Enviado com sucesso (Digitado)")
+            registro.adicionar("⏳ Aguardando 0.0s...")
+    segundos, _ = medir(rodar)
+    atualizador.parar()
+    return segundos, flushes
+
+
+def bench_relatorio(quantidade, pasta):
+    metricas = MetricasCampanha()
+
+    def rodar():
+        with open(os.path.join(pasta, "relatorio_bench.csv"), 'w', encoding='utf-8', newline='') as f:
+            escritor = csv.writer(f, delimiter=';')
+            escritor.writerow(COLUNAS_RELATORIO)
+            for _ in range(quantidade):
+                metricas.novo_contato()
+                metricas.registrar_etapa("navegacao", 1.0)
+                metricas.registrar_resultado("SUCESSO")
+                escritor.writerow(["62999999999", "Ana", "SUCESSO", "ok", "2026-01-01T00:00:00"]
+                                  + metricas.duracoes_contato() + [""])
+                f.flush()
+    return medir(rodar)
+
+
+def bench_pipeline(caminho, pasta):
+    fim = threading.Event()
+    thread = WhatsappBotThread(
+        csv_path=caminho,
+        message_template="{Olá|Oi} {nome}, {tudo bem?|como vai?}",
+        log_callback=lambda msg: None,
+        progress_callback=lambda atual, total, status="": None,
+        on_finish_callback=fim.set,
+        usar_historico=False,
+        driver=DriverFalso(),
+        atraso_entre_envios=(0, 0),
+        pausa_a_cada=0,
+    )
+    diretorio_anterior = os.getcwd()
+    os.chdir(pasta)  # Relatório, diário e métricas ficam na pasta temporária
+    try:
+        def rodar():
+            thread.start()
+            fim.wait()
+            return thread.driver_manager.enviadas
+        return medir(rodar)
+    finally:
+        os.chdir(diretorio_anterior)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS_PADRAO)
+    parser.add_argument("--pipeline-maximo", type=int, default=PIPELINE_MAXIMO,
+                        help="Maior lista usada na campanha completa (0 = pula)")
+    parser.add_argument("--json", help="Grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    resultados = []
+    for quantidade in args.tamanhos:
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, "contatos.csv")
+            gerar_csv(caminho, quantidade)
+
+            estagios = {
+                "ingestao": bench_ingestao(caminho)[0],
+                "normalizacao": bench_normalizacao(caminho)[0],
+                "template": bench_template(quantidade)[0],
+                "logs_ui": bench_logs(quantidade, pasta)[0],
+                "relatorio": bench_relatorio(quantidade, pasta)[0],
+            }
+            if quantidade <= args.pipeline_maximo:
+                estagios["campanha_completa"] = bench_pipeline(caminho, pasta)[0]
+
+        print(f"\n{quantidade:,} contatos".replace(",", "."))
+        for estagio, segundos in estagios.items():
+            por_contato = segundos / quantidade * 1e6
+            print(f"  {estagio:<18} {segundos:9.3f} s  ({por_contato:8.2f} µs/contato)")
+        resultados.append({"contatos": quantidade, "segundos": estagios})
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
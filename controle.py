@@ -0,0 +1,68 @@
+import threading
+import time
+
+
+class OperacaoCancelada(Exception):
+    """Lançada dentro do driver quando o usuário clica em PARAR."""
+
+
+class SinalControle:
+    """
+    Pausa/parada compartilhadas entre a interface, a thread do robô e o driver.
+    Toda espera passa por `esperar()`, que acorda na hora quando o estado muda
+    (em vez de dormir o tempo todo e só depois olhar as flags).
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._parado = False
+        self._pausado = False
+
+    @property
+    def parado(self):
+        return self._parado
+
+    @property
+    def pausado(self):
+        return self._pausado
+
+    def parar(self):
+        with self._cond:
+            self._parado = True
+            self._cond.notify_all()
+
+    def pausar(self):
+        with self._cond:
+            self._pausado = True
+            self._cond.notify_all()
+
+    def retomar(self):
+        with self._cond:
+            self._pausado = False
+            self._cond.notify_all()
+
+    def esperar(self, segundos=0):
+        """
+        Espera `segundos`; se pausado, continua esperando até retomar.
+        Retorna False assim que houver pedido de parada, True caso contrário.
+        """
+        fim = time.monotonic() + segundos
+        with self._cond:
+            while True:
+                if self._parado:
+                    return False
+                if self._pausado:
+                    self._cond.wait()
+                    continue
+                restante = fim - time.monotonic()
+                if restante <= 0:
+                    return True
+                self._cond.wait(restante)
+
+    def dormir(self, segundos):
+        """Como `esperar`, mas lança OperacaoCancelada na parada (para uso dentro do driver)."""
+        if not self.esperar(segundos):
+            raise OperacaoCancelada()
+
+    def checar(self):
+        if self._parado:
+            raise OperacaoCancelada()
@@ -0,0 +1,156 @@
+import os
+import glob
+import json
+from datetime import datetime
+
+from importacao import assinatura_arquivo
+
+SUFIXO_DIARIO = ".diario.jsonl"
+
+
+def caminho_diario(nome_relatorio):
+    """O diário fica ao lado do relatório: relatorio_envios_X.csv -> relatorio_envios_X.diario.jsonl"""
+    base, _ = os.path.splitext(nome_relatorio)
+    return base + SUFIXO_DIARIO
+
+
+class DiarioCampanha:
+    """
+    Diário (journal) de uma campanha em JSON Lines, gravado com fsync a cada contato.
+    - 1ª linha: cabeçalho com CSV, mensagem, total e relatório da campanha;
+    - uma linha por contato ANTES do envio, com o offset (em bytes) da próxima linha do CSV;
+    - {"i", "adiado": true, "contato"} para falha temporária (entra na repescagem) e
+      {"i", "repescado": true} antes da nova tentativa;
+    - última linha {"fim": true} quando a campanha (repescagem incluída) termina normalmente.
+    Como a linha é gravada antes do envio, uma retomada nunca repete um contato
+    (no pior caso, o contato que estava em andamento no crash fica sem envio).
+    O cabeçalho guarda tamanho e mtime do CSV: a retomada lê a partir de um offset
+    em bytes, então um CSV editado depois não pode ser retomado (ver csv_alterado).
+    """
+    def __init__(self, caminho, cabecalho, proximo_indice=0, offset=0, numeros=None, finalizado=False,
+                 adiados=None):
+        self.caminho = caminho
+        self.cabecalho = cabecalho
+        self.proximo_indice = proximo_indice
+        self.offset = offset
+        self.numeros = numeros if numeros is not None else []
+        self.finalizado = finalizado
+        # (indice, campos do contato) ainda sem repescagem, lidos por abrir()
+        self.adiados = adiados if adiados is not None else []
+        self._arquivo = None
+        self._tamanho_valido = None  # Fim da última linha inteira, se o crash cortou a última
+
+    @classmethod
+    def criar(cls, nome_relatorio, csv_path, message_template, total, **extras):
+        cabecalho = {
+            "csv": os.path.abspath(csv_path),
+            "assinatura_csv": list(assinatura_arquivo(csv_path)),
+            "mensagem": message_template,
+            "total": total,
+            "relatorio": os.path.abspath(nome_relatorio),
+            "criado_em": datetime.now().isoformat(timespec="seconds"),
+            **extras,
+        }
+        diario = cls(caminho_diario(nome_relatorio), cabecalho)
+        diario._gravar(cabecalho)
+        return diario
+
+    @classmethod
+    def abrir(cls, caminho):
+        """
+        Lê um diário existente e descobre onde a campanha parou. Uma última linha cortada
+        por um crash é ignorada e descartada do arquivo antes do próximo registro.
+        """
+        with open(caminho, 'rb') as f:
+            cabecalho = json.loads(f.readline())
+            proximo_indice = 0
+            offset = 0
+            numeros = []
+            finalizado = False
+            adiados = {}
+            posicao = tamanho_valido = f.tell()
+            for linha in f:
+                posicao += len(linha)
+                try:
+                    if not linha.endswith(b"\n"):
+                        raise ValueError("linha sem fim")
+                    registro = json.loads(linha)
+                except ValueError:
+                    # Linha cortada no meio por um crash (diários antigos podem ter registros depois dela)
+                    continue
+                tamanho_valido = posicao
+                if registro.get("fim"):
+                    finalizado = True
+                    continue
+                if registro.get("adiado"):
+                    adiados[registro["i"]] = registro["contato"]
+                    continue
+                if registro.get("repescado"):
+                    adiados.pop(registro["i"], None)
+                    continue
+                proximo_indice = registro["i"] + 1
+                offset = registro["offset"]
+                numeros.append(registro["numero"])
+        diario = cls(caminho, cabecalho, proximo_indice, offset, numeros, finalizado, list(adiados.items()))
+        if tamanho_valido != posicao:
+            diario._tamanho_valido = tamanho_valido
+        return diario
+
+    @property
+    def total(self):
+        return self.cabecalho["total"]
+
+    def csv_alterado(self):
+        """O CSV sumiu ou mudou (tamanho/mtime) desde o início da campanha."""
+        assinatura = self.cabecalho.get("assinatura_csv")
+        if assinatura is None:
+            return False  # Diário de versão antiga: sem como conferir
+        try:
+            return list(assinatura_arquivo(self.cabecalho["csv"])) != assinatura
+        except OSError:
+            return True
+
+    def registrar(self, indice, offset, numero_normalizado):
+        self.proximo_indice = indice + 1
+        self.offset = offset
+        self._gravar({"i": indice, "offset": offset, "numero": numero_normalizado})
+
+    def adiar(self, indice, contato):
+        """Falha temporária: o contato (dict serializável) fica guardado para a repescagem."""
+        self._gravar({"i": indice, "adiado": True, "contato": contato})
+
+    def repescar(self, indice):
+        """Gravado ANTES da nova tentativa: uma retomada não repete o contato."""
+        self._gravar({"i": indice, "repescado": True})
+
+    def finalizar(self):
+        self.finalizado = True
+        self._gravar({"fim": True})
+
+    def _gravar(self, registro):
+        if self._arquivo is None:
+            if self._tamanho_valido is not None:
+                # Sem isso o próximo registro ficaria grudado na linha cortada
+                os.truncate(self.caminho, self._tamanho_valido)
+                self._tamanho_valido = None
+            self._arquivo = open(self.caminho, 'a', encoding='utf-8')
+        self._arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+
+    def fechar(self):
+        if self._arquivo:
+            self._arquivo.close()
+            self._arquivo = None
+
+
+def ultimo_diario_pendente(pasta="."):
+    """Diário mais recente de uma campanha que não terminou (ou None)."""
+    for caminho in sorted(glob.glob(os.path.join(pasta, "*" + SUFIXO_DIARIO)), reverse=True):
+        try:
+            diario = DiarioCampanha.abrir(caminho)
+        except (OSError, ValueError):
+            continue
+        if not diario.finalizado:
+            return diario
+    return None
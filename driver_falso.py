@@ -0,0 +1,109 @@
+import random
+import zlib
+
+from controle import SinalControle
+from metricas import MetricasCampanha
+from telefones import normalizar_numero, DDD_PADRAO, DDI_PADRAO
+from falhas import ResultadoEnvio, ENVIADO, NUMERO_INVALIDO, TRANSITORIA, NAVEGADOR_CAIU
+
+# Resultados possíveis e o que o WhatsAppDriver real devolve para cada um
+VALIDO = "valido"
+INVALIDO = "invalido"
+TIMEOUT = "timeout"  # Falha temporária: a segunda tentativa do mesmo número funciona
+QUEDA = "queda"  # O "navegador" cai e precisa de iniciar_driver() de novo
+DETALHES_RESULTADO = {
+    VALIDO: ResultadoEnvio(True, "Enviado com sucesso (Digitado)", ENVIADO),
+    INVALIDO: ResultadoEnvio(False, "Número inválido/não tem WhatsApp", NUMERO_INVALIDO),
+    TIMEOUT: ResultadoEnvio(False, "Timeout: Caixa de texto não encontrada", TRANSITORIA),
+    QUEDA: ResultadoEnvio(False, "Navegador caiu: chrome not reachable", NAVEGADOR_CAIU),
+}
+
+
+class DriverFalso:
+    """
+    Driver em Python puro, sem Chrome nem rede, que segue protocolo_driver.DriverEnvio.
+    O resultado de cada número é fixo (hash do número + semente), então a mesma
+    lista dá sempre o mesmo resultado. `latencia` simula o tempo de cada etapa
+    (0 = o mais rápido possível, para medir só o custo do próprio app).
+    """
+    def __init__(self, proporcoes=None, seed=0, latencia=0.0, resultados=None,
+                 ddd_padrao=DDD_PADRAO, ddi_padrao=DDI_PADRAO, controle=None, metricas=None):
+        self.proporcoes = proporcoes or {VALIDO: 0.85, INVALIDO: 0.1, TIMEOUT: 0.05}
+        self.seed = seed
+        self.latencia = latencia
+        self.resultados = resultados or {}  # numero normalizado -> VALIDO/INVALIDO/TIMEOUT/QUEDA
+        self.ddd_padrao = ddd_padrao
+        self.ddi_padrao = ddi_padrao
+        self.controle = controle or SinalControle()
+        self.metricas = metricas or MetricasCampanha()
+        self.tempos_inicializacao = {}
+        self.origem_chromedriver = "falso"
+        self.bytes_cache_liberados = 0
+        self.iniciado = False
+        self.inicializacoes = 0  # Quantas vezes o "navegador" foi aberto (reciclagens incluídas)
+        self.enviadas = 0
+        self._falharam = set()  # Números que já tiveram TIMEOUT/QUEDA (na próxima tentativa funcionam)
+
+    def iniciar_driver(self):
+        self.iniciado = True
+        self.inicializacoes += 1
+        self.tempos_inicializacao = {"abrir Chrome": 0.0}
+
+    def aguardar_whatsapp_pronto(self, tempo_maximo=0, ao_mostrar_qr=None):
+        return "sessao"
+
+    def resultado_para(self, numero_formatado):
+        if numero_formatado in self.resultados:
+            return self.resultados[numero_formatado]
+        # Valor entre 0 e 1 estável para o número (não depende do PYTHONHASHSEED)
+        sorteio = random.Random(zlib.crc32(f"{self.seed}:{numero_formatado}".encode())).random()
+        acumulado = 0.0
+        for resultado, proporcao in self.proporcoes.items():
+            acumulado += proporcao
+            if sorteio < acumulado:
+                return resultado
+        return VALIDO
+
+    def _etapa(self, nome, fator=1.0, cancelavel=True):
+        with self.metricas.etapa(nome):
+            if not cancelavel:
+                # Como o WhatsAppDriver depois do ENTER: PARAR só encurta a espera
+                self.controle.esperar(self.latencia * fator)
+            elif self.latencia:
+                self.controle.dormir(self.latencia * fator)
+            else:
+                self.controle.checar()
+
+    def enviar_mensagem(self, numero, mensagem_final):
+        if not self.iniciado:
+            return ResultadoEnvio(False, "Navegador caiu: driver não iniciado", NAVEGADOR_CAIU)
+        numero_formatado = normalizar_numero(numero, self.ddd_padrao, self.ddi_padrao)
+        resultado = self.resultado_para(numero_formatado)
+        if resultado in (TIMEOUT, QUEDA):
+            if numero_formatado in self._falharam:
+                resultado = VALIDO
+            else:
+                self._falharam.add(numero_formatado)
+
+        self._etapa("navegacao")
+        if resultado == QUEDA:
+            self.iniciado = False
+            return DETALHES_RESULTADO[QUEDA]
+        if resultado == TIMEOUT:
+            self._etapa("abrir_conversa", fator=4)
+            return DETALHES_RESULTADO[TIMEOUT]
+        self._etapa("abrir_conversa")
+        if resultado == INVALIDO:
+            return DETALHES_RESULTADO[INVALIDO]
+
+        self._etapa("leitura")
+        self._etapa("digitacao", fator=2)
+        self._etapa("pos_envio", cancelavel=False)
+        self.enviadas += 1
+        return DETALHES_RESULTADO[VALIDO]
+
+    def pid_navegador(self):
+        return None
+
+    def fechar(self):
+        self.iniciado = False
@@ -0,0 +1,17 @@
+from collections import namedtuple
+
+# Tipos de resultado de um envio (o driver classifica, a thread decide o que fazer)
+ENVIADO = "enviado"
+NUMERO_INVALIDO = "numero_invalido"  # Definitivo: não tenta de novo (e o histórico lembra)
+TRANSITORIA = "transitoria"  # Timeout de carregamento, elemento obsoleto...: nova tentativa no fim
+NAVEGADOR_CAIU = "navegador_caiu"  # Chrome/chromedriver morreram: reabre o navegador e segue
+DESCONHECIDA = "desconhecida"
+
+# `sucesso` e `detalhes` como antes; `tipo` é um dos valores acima
+ResultadoEnvio = namedtuple("ResultadoEnvio", "sucesso detalhes tipo")
+
+
+def resumo_erro(erro):
+    """Primeira linha da mensagem da exceção (as do Selenium trazem o stacktrace junto)."""
+    texto = (getattr(erro, "msg", None) or str(erro)).strip()
+    return texto.splitlines()[0] if texto else type(erro).__name__
@@ -0,0 +1,207 @@
+import os
+import itertools
+import threading
+
+from controle import SinalControle
+from robo import WhatsappBotThread, criar_driver
+from telefones import DDD_PADRAO, DDI_PADRAO
+
+# Situação de cada campanha na fila
+PENDENTE = "pendente"
+RODANDO = "rodando"
+CONCLUIDA = "concluída"
+CANCELADA = "cancelada"
+REMOVIDA = "removida"
+ERRO = "erro"
+
+_ids = itertools.count(1)
+
+
+class ItemFila:
+    """Uma campanha da fila: lista + mensagem, e o relatório gerado ao rodar."""
+    def __init__(self, csv_path, message_template, resumo_importacao=None):
+        self.id = next(_ids)
+        self.csv_path = csv_path
+        self.message_template = message_template
+        self.resumo_importacao = resumo_importacao  # importacao.ResumoImportacao do preview, se houver
+        self.status = PENDENTE
+        self.relatorio = None
+        self.detalhes = ""
+
+    def descricao(self):
+        relatorio = f" → {self.relatorio}" if self.relatorio else ""
+        return f"#{self.id} {os.path.basename(self.csv_path)} [{self.status}]{relatorio}"
+
+
+class FilaCampanhas(threading.Thread):
+    """
+    Roda várias campanhas (CSV + mensagem) em sequência no MESMO navegador:
+    Chrome, chromedriver e sessão do WhatsApp são carregados uma vez só.
+    Cada campanha é uma WhatsappBotThread executada nesta thread, com relatório,
+    diário e métricas próprios. Itens podem ser adicionados/removidos durante a execução.
+
+    `opcoes`: parâmetros repassados a cada WhatsappBotThread (ddd_padrao, usar_historico...).
+    """
+    def __init__(self, log_callback, progress_callback, on_finish_callback, itens=None, fila_callback=None,
+                 driver=None, **opcoes):
+        super().__init__()
+        self.log_callback = log_callback
+        self.progress_callback = progress_callback
+        self.on_finish_callback = on_finish_callback
+        self.fila_callback = fila_callback  # Chamado quando a fila muda (para redesenhar a lista)
+        self.opcoes = opcoes
+        self._itens = list(itens or [])
+        self._lock = threading.Lock()
+        # Pausa/parada entre campanhas; durante uma campanha o sinal é repassado ao robô atual
+        self.controle = SinalControle()
+        self.bot_atual = None
+        self.is_running = False
+        if driver is None:
+            driver = criar_driver(opcoes.get("ddd_padrao", DDD_PADRAO), opcoes.get("ddi_padrao", DDI_PADRAO),
+                                  opcoes.get("permitir_download_driver", True),
+                                  opcoes.get("limpar_cache_perfil", False),
+                                  opcoes.get("bloquear_midia", False), opcoes.get("headless", False))
+        self.driver = driver
+
+    # --- Edição da fila (qualquer thread) ---
+
+    def adicionar(self, csv_path, message_template, resumo_importacao=None):
+        item = ItemFila(csv_path, message_template, resumo_importacao)
+        with self._lock:
+            self._itens.append(item)
+        self.log_callback(f"➕ Fila: {item.descricao()}")
+        self._avisar()
+        return item
+
+    def remover(self, item_id):
+        """Remove um item pendente; se for a campanha em andamento, ela é parada e a fila segue."""
+        with self._lock:
+            item = next((i for i in self._itens if i.id == item_id), None)
+            if not item or item.status not in (PENDENTE, RODANDO):
+                return False
+            rodando = item.status == RODANDO
+            item.status = REMOVIDA
+            bot = self.bot_atual
+        if rodando and bot:
+            bot.stop()
+        self.log_callback(f"➖ Fila: #{item.id} removida.")
+        self._avisar()
+        return True
+
+    def itens(self):
+        with self._lock:
+            return list(self._itens)
+
+    def _proximo(self):
+        with self._lock:
+            item = next((i for i in self._itens if i.status == PENDENTE), None)
+            if item:
+                item.status = RODANDO
+            return item
+
+    def _avisar(self):
+        if self.fila_callback:
+            self.fila_callback(self.itens())
+
+    # --- Execução ---
+
+    def run(self):
+        self.is_running = True
+        navegador_aberto = False
+        try:
+            while True:
+                # Bloqueia enquanto pausado entre campanhas; False = PARAR
+                if not self.controle.esperar(0):
+                    break
+                item = self._proximo()
+                if not item:
+                    break
+                pendentes = sum(1 for i in self.itens() if i.status == PENDENTE)
+                self.log_callback(f"📋 Campanha #{item.id}: {os.path.basename(item.csv_path)} "
+                                  f"({pendentes} na fila depois desta)")
+                self._avisar()
+
+                bot = WhatsappBotThread(
+                    csv_path=item.csv_path,
+                    message_template=item.message_template,
+                    log_callback=self.log_callback,
+                    progress_callback=self.progress_callback,
+                    on_finish_callback=lambda: None,
+                    resumo_importacao=item.resumo_importacao,
+                    driver=self.driver,
+                    navegador_aberto=navegador_aberto,
+                    fechar_navegador=False,
+                    **self.opcoes,
+                )
+                with self._lock:
+                    self.bot_atual = bot
+                # PARAR/pausa chegaram entre a checagem acima e a criação do robô
+                if self.controle.parado:
+                    bot.controle.parar()
+                elif self.controle.pausado:
+                    bot.controle.pausar()
+
+                bot.run()  # Nesta thread: uma campanha por vez no mesmo navegador
+
+                with self._lock:
+                    self.bot_atual = None
+                    # Campanha que falhou antes de abrir a lista não chega a criar o relatório
+                    if bot.nome_relatorio and os.path.exists(bot.nome_relatorio):
+                        item.relatorio = bot.nome_relatorio
+                    if bot.erro:
+                        item.status, item.detalhes = ERRO, str(bot.erro)
+                    elif item.status == RODANDO:
+                        item.status = CANCELADA if bot.stop_signal else CONCLUIDA
+                self._avisar()
+
+                navegador_aberto = bot.navegador_aberto
+                if bot.erro:
+                    # Estado do navegador desconhecido depois de um erro (mesmo se o WhatsApp não
+                    # chegou a carregar, o Chrome pode estar aberto e prender o perfil): a próxima reabre
+                    try:
+                        self.driver.fechar()
+                    except Exception as e:
+                        self.log_callback(f"⚠️ Erro ao fechar o navegador: {e}")
+                    navegador_aberto = False
+        finally:
+            self.driver.fechar()
+            self.is_running = False
+            self.log_callback("🏁 Fila finalizada.")
+            self.on_finish_callback()
+
+    # --- Mesma interface de controle da WhatsappBotThread ---
+
+    @property
+    def is_paused(self):
+        return self.controle.pausado
+
+    @property
+    def stop_signal(self):
+        return self.controle.parado
+
+    def pause(self):
+        self.controle.pausar()
+        with self._lock:
+            bot = self.bot_atual
+        if bot:
+            bot.pause()
+        else:
+            self.log_callback("⏸️ Pausado.")
+
+    def resume(self):
+        self.controle.retomar()
+        with self._lock:
+            bot = self.bot_atual
+        if bot:
+            bot.resume()
+        else:
+            self.log_callback("▶️ Retomado.")
+
+    def stop(self):
+        self.controle.parar()
+        with self._lock:
+            bot = self.bot_atual
+        if bot:
+            bot.stop()
+        else:
+            self.log_callback("⚠️ Parando...")
@@ -0,0 +1,172 @@
+import os
+import csv
+import glob
+import sqlite3
+from datetime import datetime, timedelta
+from telefones import normalizar_numero, DDD_PADRAO, DDI_PADRAO
+from falhas import NUMERO_INVALIDO
+
+HISTORICO_DB = "historico_envios.db"
+OPTOUT_CSV = "optout.csv"  # Um número por linha (colunas extras são ignoradas)
+PADRAO_RELATORIOS = "relatorio_envios_*.csv"
+DIAS_SEM_REPETIR = 30  # Não reenvia para quem recebeu com sucesso nesse período
+
+# Classes de resultado guardadas no histórico
+SUCESSO = "sucesso"
+INVALIDO = "invalido"
+FALHA = "falha"
+
+
+def classificar_resultado(sucesso, detalhes, tipo_falha=None):
+    """
+    `tipo_falha` (falhas.*) decide quando informado; sem ele (relatórios antigos,
+    sem a coluna TipoFalha) o texto dos detalhes é o único indício.
+    """
+    if sucesso:
+        return SUCESSO
+    if tipo_falha:
+        return INVALIDO if tipo_falha == NUMERO_INVALIDO else FALHA
+    if "inválido" in (detalhes or "").lower():
+        return INVALIDO
+    return FALHA
+
+
+class HistoricoEnvios:
+    """
+    Histórico de envios e lista de opt-out em SQLite, indexados pelo número
+    normalizado. Consultado antes de cada contato, sem abrir o navegador.
+    Use na mesma thread que criou o objeto (restrição do sqlite3).
+    """
+    def __init__(self, caminho=HISTORICO_DB, ddd_padrao=DDD_PADRAO, ddi_padrao=DDI_PADRAO,
+                 dias_sem_repetir=DIAS_SEM_REPETIR):
+        self.ddd_padrao = ddd_padrao
+        self.ddi_padrao = ddi_padrao
+        self.dias_sem_repetir = dias_sem_repetir
+        self.conn = sqlite3.connect(caminho)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS envios (
+                numero TEXT PRIMARY KEY,
+                classe TEXT NOT NULL,
+                detalhes TEXT,
+                atualizado_em TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS optout (
+                numero TEXT PRIMARY KEY,
+                motivo TEXT,
+                criado_em TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS importacoes (
+                arquivo TEXT PRIMARY KEY,
+                importado_em TEXT NOT NULL
+            );
+        """)
+        self.conn.commit()
+
+    def _normalizar(self, numero):
+        return normalizar_numero(numero, self.ddd_padrao, self.ddi_padrao)
+
+    def registrar(self, numero, sucesso, detalhes, quando=None, commit=True, tipo_falha=None):
+        """`tipo_falha`: falhas.ResultadoEnvio.tipo; só NUMERO_INVALIDO suprime o número de vez."""
+        quando = quando or datetime.now()
+        # Só sobrescreve se o resultado for mais recente (importações fora de ordem)
+        self.conn.execute(
+            "INSERT INTO envios (numero, classe, detalhes, atualizado_em) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(numero) DO UPDATE SET classe = excluded.classe, detalhes = excluded.detalhes, "
+            "atualizado_em = excluded.atualizado_em WHERE excluded.atualizado_em >= envios.atualizado_em",
+            (self._normalizar(numero), classificar_resultado(sucesso, detalhes, tipo_falha), detalhes,
+             quando.isoformat(timespec="seconds"))
+        )
+        if commit:
+            self.conn.commit()
+
+    def adicionar_optout(self, numero, motivo="", commit=True):
+        self.conn.execute(
+            "INSERT OR IGNORE INTO optout (numero, motivo, criado_em) VALUES (?, ?, ?)",
+            (self._normalizar(numero), motivo, datetime.now().isoformat(timespec="seconds"))
+        )
+        if commit:
+            self.conn.commit()
+
+    def motivo_para_pular(self, numero):
+        """
+        Retorna o motivo para não enviar (texto) ou None se o número está liberado.
+        """
+        numero = self._normalizar(numero)
+        if self.conn.execute("SELECT 1 FROM optout WHERE numero = ?", (numero,)).fetchone():
+            return "Opt-out (pediu para não receber)"
+
+        linha = self.conn.execute("SELECT classe, atualizado_em FROM envios WHERE numero = ?", (numero,)).fetchone()
+        if not linha:
+            return None
+        classe, atualizado_em = linha
+        if classe == INVALIDO:
+            return "Número inválido em envio anterior"
+        if classe == SUCESSO and self.dias_sem_repetir > 0:
+            limite = datetime.now() - timedelta(days=self.dias_sem_repetir)
+            if datetime.fromisoformat(atualizado_em) >= limite:
+                return f"Já recebeu mensagem nos últimos {self.dias_sem_repetir} dias"
+        return None
+
+    def importar_relatorio(self, caminho):
+        """
+        Importa um relatorio_envios_*.csv antigo. Como o relatório só tem a hora,
+        a data vem do nome do arquivo (ou da data de modificação).
+        Retorna quantas linhas foram importadas; arquivos já importados são ignorados.
+        """
+        nome = os.path.basename(caminho)
+        if self.conn.execute("SELECT 1 FROM importacoes WHERE arquivo = ?", (nome,)).fetchone():
+            return 0
+
+        try:
+            data_base = datetime.strptime(nome, "relatorio_envios_%Y%m%d_%H%M%S.csv")
+        except ValueError:
+            data_base = datetime.fromtimestamp(os.path.getmtime(caminho))
+
+        importados = 0
+        with open(caminho, 'r', encoding='utf-8', newline='') as f:
+            leitor = csv.reader(f, delimiter=';')
+            cabecalho = next(leitor, None) or []
+            # Relatórios novos trazem o tipo da falha; nos antigos vale o texto dos detalhes
+            coluna_tipo = cabecalho.index("TipoFalha") if "TipoFalha" in cabecalho else None
+            for linha in leitor:
+                if len(linha) < 4: continue
+                numero, _, status, detalhes = linha[:4]
+                quando = data_base
+                if len(linha) > 4:
+                    try:
+                        quando = datetime.fromisoformat(linha[4])
+                    except ValueError:
+                        pass  # Formato antigo HH:MM:SS
+                tipo_falha = linha[coluna_tipo] if coluna_tipo is not None and len(linha) > coluna_tipo else None
+                self.registrar(numero, status == "SUCESSO", detalhes, quando=quando, commit=False,
+                               tipo_falha=tipo_falha)
+                importados += 1
+
+        self.marcar_importado(caminho)
+        return importados
+
+    def marcar_importado(self, caminho):
+        """Relatórios gerados com o histórico ativo já estão no banco: não reimporta."""
+        self.conn.execute("INSERT OR IGNORE INTO importacoes (arquivo, importado_em) VALUES (?, ?)",
+                          (os.path.basename(caminho), datetime.now().isoformat(timespec="seconds")))
+        self.conn.commit()
+
+    def importar_relatorios(self, padrao=PADRAO_RELATORIOS):
+        return sum(self.importar_relatorio(caminho) for caminho in sorted(glob.glob(padrao)))
+
+    def importar_optout(self, caminho=OPTOUT_CSV):
+        """Lê a lista de opt-out (primeira coluna = telefone). Retorna quantos números foram lidos."""
+        if not os.path.exists(caminho):
+            return 0
+        lidos = 0
+        with open(caminho, 'r', encoding='utf-8', newline='') as f:
+            for linha in csv.reader(f, delimiter=';'):
+                if not linha or not any(c.isdigit() for c in linha[0]): continue
+                motivo = linha[1].strip() if len(linha) > 1 else ""
+                self.adicionar_optout(linha[0], motivo, commit=False)
+                lidos += 1
+        self.conn.commit()
+        return lidos
+
+    def fechar(self):
+        self.conn.close()
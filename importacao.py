@@ -0,0 +1,254 @@
+import os
+import re
+import csv
+import codecs
+import unicodedata
+from collections import namedtuple
+from telefones import normalizar_numero, numero_valido, IndiceNumeros, DDD_PADRAO, DDI_PADRAO
+
+TAMANHO_AMOSTRA = 64 * 1024  # Bytes lidos para detectar codificação, delimitador e cabeçalho
+LINHAS_AMOSTRA = 50
+DELIMITADORES = ";,\t|"
+
+# Nomes de cabeçalho reconhecidos (comparados sem acento e em minúsculas)
+ALIASES_TELEFONE = {"telefone", "telefones", "fone", "celular", "cel", "whatsapp", "whats", "numero",
+                    "numero_telefone", "phone", "phone_number", "mobile", "tel"}
+ALIASES_NOME = {"nome", "name", "cliente", "nome_cliente", "primeiro_nome", "first_name", "contato"}
+
+# Um contato validado e normalizado.
+# `campos`: nome + colunas extras, prontos para o template ({nome}, {cidade}...)
+# `offset`: posição em bytes logo depois da linha (onde uma retomada começa)
+Contato = namedtuple("Contato", "numero nome normalizado campos valido offset")
+
+
+class ErroImportacao(ValueError):
+    """Arquivo que não dá para ler como lista de contatos."""
+
+
+class FormatoCSV:
+    """Resultado da detecção: como ler o arquivo e qual coluna é o quê."""
+    def __init__(self, encoding, delimitador, tem_cabecalho, coluna_telefone, coluna_nome, extras, bom=0):
+        self.encoding = encoding
+        self.delimitador = delimitador
+        self.tem_cabecalho = tem_cabecalho
+        self.coluna_telefone = coluna_telefone
+        self.coluna_nome = coluna_nome
+        self.extras = extras  # {nome_do_campo: índice da coluna}
+        self.bom = bom  # Bytes de BOM no início do arquivo
+
+    @property
+    def campos(self):
+        """Placeholders disponíveis para a mensagem."""
+        return {"nome", *self.extras}
+
+    def descricao(self):
+        delimitador = {"\t": "TAB"}.get(self.delimitador, self.delimitador)
+        cabecalho = "com cabeçalho" if self.tem_cabecalho else "sem cabeçalho"
+        extras = ", ".join("{" + c + "}" for c in self.extras)
+        return f"{self.encoding} | '{delimitador}' | {cabecalho}" + (f" | campos extras: {extras}" if extras else "")
+
+
+def _chave(texto):
+    """'Número Telefone' -> 'numero_telefone' (também vira nome de placeholder)."""
+    sem_acento = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    chave = re.sub(r'[^a-z0-9]+', "_", sem_acento.lower()).strip("_")
+    if chave and chave[0].isdigit():
+        chave = "c_" + chave
+    return chave
+
+
+def _parece_telefone(valor):
+    return sum(c.isdigit() for c in valor) >= 8
+
+
+def _detectar_encoding(amostra):
+    if amostra.startswith(codecs.BOM_UTF8):
+        return "utf-8", len(codecs.BOM_UTF8)
+    if amostra.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        raise ErroImportacao("Arquivo em UTF-16: salve como 'CSV UTF-8' ou 'CSV (separado por vírgulas)'.")
+    try:
+        # final=False: a amostra pode cortar um caractere multibyte no meio
+        codecs.getincrementaldecoder("utf-8")().decode(amostra, final=False)
+        return "utf-8", 0
+    except UnicodeDecodeError:
+        pass
+    try:
+        amostra.decode("cp1252")  # Excel no Windows
+        return "cp1252", 0
+    except UnicodeDecodeError:
+        return "latin-1", 0
+
+
+def _detectar_delimitador(texto):
+    # ";" com a mesma contagem em todas as linhas ganha do Sniffer, que pode escolher a
+    # vírgula de dentro de uma coluna ("Silva, João") quando não há cabeçalho
+    contagens_pv = {l.count(";") for l in texto.splitlines()[:LINHAS_AMOSTRA] if l.strip()}
+    if len(contagens_pv) == 1 and 0 not in contagens_pv:
+        return ";"
+    try:
+        return csv.Sniffer().sniff(texto, delimiters=DELIMITADORES).delimiter
+    except csv.Error:
+        primeira = texto.split("\n", 1)[0]
+        contagens = {d: primeira.count(d) for d in DELIMITADORES}
+        melhor = max(contagens, key=contagens.get)
+        return melhor if contagens[melhor] else ";"
+
+
+def detectar_formato(caminho):
+    """
+    Lê só o começo do arquivo e descobre codificação (UTF-8, com ou sem BOM,
+    ou Latin-1/CP1252), delimitador, se a 1ª linha é cabeçalho e o mapeamento
+    das colunas (telefone, nome e campos extras para a mensagem).
+    """
+    with open(caminho, 'rb') as f:
+        amostra = f.read(TAMANHO_AMOSTRA)
+    if not amostra.strip():
+        raise ErroImportacao("Arquivo vazio.")
+
+    encoding, bom = _detectar_encoding(amostra)
+    texto = codecs.getincrementaldecoder(encoding)(errors="replace").decode(amostra[bom:], final=False)
+    if len(amostra) == TAMANHO_AMOSTRA and "\n" in texto:
+        texto = texto[:texto.rindex("\n") + 1]  # Descarta a última linha (cortada)
+
+    delimitador = _detectar_delimitador(texto)
+    linhas = [l for l in csv.reader(texto.splitlines(), delimiter=delimitador) if any(c.strip() for c in l)]
+    linhas = linhas[:LINHAS_AMOSTRA]
+    if not linhas:
+        raise ErroImportacao("Nenhuma linha com dados.")
+
+    # Cabeçalho: 1ª linha sem nenhum valor com cara de telefone, seguida de linhas com telefone
+    primeira = [c.strip() for c in linhas[0]]
+    tem_cabecalho = not any(_parece_telefone(c) for c in primeira) and (
+        len(linhas) == 1 or any(_parece_telefone(c) for l in linhas[1:] for c in l)
+    )
+
+    coluna_telefone = coluna_nome = None
+    extras = {}
+    if tem_cabecalho:
+        chaves = [_chave(c) for c in primeira]
+        for i, chave in enumerate(chaves):
+            if coluna_telefone is None and chave in ALIASES_TELEFONE:
+                coluna_telefone = i
+            elif coluna_nome is None and chave in ALIASES_NOME:
+                coluna_nome = i
+        dados = linhas[1:]
+    else:
+        chaves = []
+        dados = linhas
+
+    largura = max(len(l) for l in linhas)
+    if coluna_telefone is None:
+        # Coluna onde a maioria das linhas tem algo com cara de telefone
+        pontos = [sum(1 for l in dados if i < len(l) and _parece_telefone(l[i])) for i in range(largura)]
+        coluna_telefone = max(range(largura), key=lambda i: pontos[i]) if any(pontos) else 0
+    if coluna_nome is None:
+        candidatas = [i for i in range(largura) if i != coluna_telefone and (not chaves or not chaves[i]
+                      or chaves[i] not in ALIASES_TELEFONE)]
+        coluna_nome = next((i for i in candidatas
+                            if any(l[i].strip() and not _parece_telefone(l[i]) for l in dados if i < len(l))), None)
+
+    for i in range(largura):
+        if i in (coluna_telefone, coluna_nome):
+            continue
+        chave = chaves[i] if i < len(chaves) and chaves[i] else f"coluna{i + 1}"
+        if chave != "nome" and chave not in extras:
+            extras[chave] = i
+
+    return FormatoCSV(encoding, delimitador, tem_cabecalho, coluna_telefone, coluna_nome, extras, bom)
+
+
+def ler_contatos(caminho, formato=None, ddd_padrao=DDD_PADRAO, ddi_padrao=DDI_PADRAO, indice=None, inicio=0):
+    """
+    Gera Contato linha a linha, sem carregar a lista inteira.
+    `inicio` pula direto para um offset salvo no diário da campanha (o cabeçalho
+    só é descartado quando a leitura começa do início do arquivo).
+    Com `indice`, números repetidos (depois de normalizados) são descartados.
+    """
+    formato = formato or detectar_formato(caminho)
+    col_tel, col_nome, extras = formato.coluna_telefone, formato.coluna_nome, formato.extras
+    encoding = formato.encoding
+
+    with open(caminho, 'rb') as f:
+        inicio = max(inicio, formato.bom)
+        f.seek(inicio)
+        posicao = inicio
+
+        # O csv.reader puxa uma linha por vez, então `posicao` sempre aponta
+        # para o fim da última linha física consumida
+        def linhas():
+            nonlocal posicao
+            for linha_bytes in iter(f.readline, b''):
+                posicao += len(linha_bytes)
+                yield linha_bytes.decode(encoding, errors="replace")
+
+        leitor = csv.reader(linhas(), delimiter=formato.delimitador)
+        pular_cabecalho = formato.tem_cabecalho and inicio == formato.bom
+        for linha in leitor:
+            if not linha or not any(c.strip() for c in linha): continue
+            if pular_cabecalho:
+                pular_cabecalho = False
+                continue
+            numero = linha[col_tel].strip() if col_tel < len(linha) else ""
+            normalizado = normalizar_numero(numero, ddd_padrao, ddi_padrao)
+            if indice is not None and not indice.registrar(normalizado):
+                continue
+            nome = linha[col_nome].strip() if col_nome is not None and col_nome < len(linha) else ""
+            campos = {"nome": nome}
+            for chave, i in extras.items():
+                campos[chave] = linha[i].strip() if i < len(linha) else ""
+            yield Contato(numero, nome, normalizado, campos, numero_valido(normalizado, ddi_padrao), posicao)
+
+
+class ResumoImportacao:
+    """
+    Resultado da passada completa pelo arquivo (feita uma vez, no preview).
+    A thread reaproveita formato e total se o arquivo não mudou desde então.
+    """
+    def __init__(self, caminho, formato, total, duplicados, invalidos, ddd_padrao, ddi_padrao):
+        self.caminho = os.path.abspath(caminho)
+        self.formato = formato
+        self.total = total
+        self.duplicados = duplicados
+        self.invalidos = invalidos
+        self.ddd_padrao = ddd_padrao
+        self.ddi_padrao = ddi_padrao
+        self._assinatura = assinatura_arquivo(caminho)
+
+    def vale_para(self, caminho, ddd_padrao, ddi_padrao):
+        return (os.path.abspath(caminho) == self.caminho and assinatura_arquivo(caminho) == self._assinatura
+                and (ddd_padrao, ddi_padrao) == (self.ddd_padrao, self.ddi_padrao))
+
+
+def assinatura_arquivo(caminho):
+    """(tamanho, mtime): muda quando o arquivo é editado."""
+    info = os.stat(caminho)
+    return info.st_size, info.st_mtime_ns
+
+
+def analisar(caminho, ddd_padrao=DDD_PADRAO, ddi_padrao=DDI_PADRAO, formato=None, ao_ler=None, cancelado=None):
+    """
+    Passada única pelo arquivo: conta contatos (sem repetidos), repetidos e inválidos.
+    `ao_ler(contato)` recebe cada contato (o preview guarda os que vai mostrar);
+    `cancelado()` verdadeiro interrompe a leitura e retorna None.
+    """
+    formato = formato or detectar_formato(caminho)
+    indice = IndiceNumeros()
+    invalidos = 0
+    for contato in ler_contatos(caminho, formato, ddd_padrao, ddi_padrao, indice):
+        if cancelado and cancelado():
+            return None
+        if not contato.valido:
+            invalidos += 1
+        if ao_ler:
+            ao_ler(contato)
+    return ResumoImportacao(caminho, formato, len(indice), indice.duplicados, invalidos, ddd_padrao, ddi_padrao)
+
+
+def contar_contatos(caminho, formato=None, ddd_padrao=DDD_PADRAO, ddi_padrao=DDI_PADRAO):
+    """
+    Passada rápida só para contar os contatos (total exato do progresso).
+    Retorna (total sem repetidos, quantidade de repetidos).
+    Só o índice de números fica em memória, não as linhas.
+    """
+    resumo = analisar(caminho, ddd_padrao, ddi_padrao, formato)
+    return resumo.total, resumo.duplicados
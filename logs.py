@@ -0,0 +1,83 @@
+import os
+import threading
+import time
+import logging
+from collections import deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+LOG_DIR = "logs"
+LOG_ARQUIVO = "wa_chatbot.log"
+
+
+class AtualizadorUI:
+    """
+    Agrupa pedidos de atualização da tela: no máximo `max_por_segundo`
+    chamadas de `flush_callback`, não importa quantas mensagens chegarem.
+    """
+    def __init__(self, flush_callback, max_por_segundo=4):
+        self.flush_callback = flush_callback
+        self.intervalo = 1.0 / max_por_segundo
+        self._pendente = threading.Event()
+        self._parar = False
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def marcar(self):
+        self._pendente.set()
+
+    def _loop(self):
+        while not self._parar:
+            self._pendente.wait()
+            self._pendente.clear()
+            if self._parar: break
+            try:
+                self.flush_callback()
+            except Exception as e:
+                print(f"Erro ao atualizar UI: {e}")
+            time.sleep(self.intervalo)
+
+    def parar(self):
+        self._parar = True
+        self._pendente.set()
+
+
+class RegistroLog:
+    """
+    Log em três camadas:
+    - buffer circular (últimas `max_linhas`) mostrado na interface;
+    - arquivo completo com rotação em disco;
+    - aviso ao AtualizadorUI, que decide quando redesenhar.
+    """
+    def __init__(self, atualizador=None, max_linhas=500, log_dir=LOG_DIR,
+                 max_bytes=5 * 1024 * 1024, backups=5):
+        self.atualizador = atualizador
+        self._linhas = deque(maxlen=max_linhas)
+        self._lock = threading.Lock()
+
+        os.makedirs(log_dir, exist_ok=True)
+        self._logger = logging.getLogger("wa_chatbot")
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        caminho = os.path.abspath(os.path.join(log_dir, LOG_ARQUIVO))
+        # Um arquivo de log por processo: troca o handler se a pasta mudou
+        for h in list(self._logger.handlers):
+            if isinstance(h, RotatingFileHandler) and h.baseFilename != caminho:
+                self._logger.removeHandler(h)
+                h.close()
+        if not self._logger.handlers:
+            handler = RotatingFileHandler(caminho, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self._logger.addHandler(handler)
+
+    def adicionar(self, message):
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        with self._lock:
+            self._linhas.append(f"[{timestamp}] {message}")
+        self._logger.info(message)
+        if self.atualizador:
+            self.atualizador.marcar()
+
+    def texto(self):
+        with self._lock:
+            return "\n".join(self._linhas) + "\n"
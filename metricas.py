@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import threading
+from collections import deque, Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+# Etapas medidas dentro do driver em cada contato (na ordem em que acontecem)
+ETAPAS_ENVIO = ["navegacao", "abrir_conversa", "leitura", "digitacao", "pos_envio"]
+# Etapas medidas na thread do robô: envio completo e espera entre contatos
+ETAPA_ENVIO_TOTAL = "envio"
+ETAPA_PAUSA = "pausa"
+# Colunas de tempo no relatório (segundos)
+ETAPAS_RELATORIO = ETAPAS_ENVIO + [ETAPA_ENVIO_TOTAL]
+JANELA_PERCENTIS = 1000  # Percentis calculados sobre os últimos N valores de cada etapa
+
+
+def _percentil(valores_ordenados, p):
+    if not valores_ordenados:
+        return 0.0
+    k = (len(valores_ordenados) - 1) * p
+    baixo = int(k)
+    alto = min(baixo + 1, len(valores_ordenados) - 1)
+    return valores_ordenados[baixo] + (valores_ordenados[alto] - valores_ordenados[baixo]) * (k - baixo)
+
+
+def _motivo_curto(detalhes):
+    # "Erro crítico: <mensagem da exceção>" -> "Erro crítico" (evita um motivo por exceção)
+    return (detalhes or "desconhecido").split(":")[0].strip()
+
+
+class MetricasCampanha:
+    """
+    Tempos por etapa de cada contato e contadores de resultado da campanha.
+    Memória constante: guarda só soma/contagem e uma janela recente por etapa.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._janelas = {}
+        self._somas = Counter()
+        self._contagens = Counter()
+        self.resultados = Counter()
+        self.falhas_por_motivo = Counter()
+        self.contato_atual = {}
+        self.recursos = {}  # Última medição do navegador (recursos.MonitorRecursos)
+        self.reciclagens = 0
+        self.inicio = datetime.now()
+
+    def novo_contato(self):
+        self.contato_atual = {}
+
+    def registrar_etapa(self, etapa, segundos):
+        with self._lock:
+            self.contato_atual[etapa] = self.contato_atual.get(etapa, 0.0) + segundos
+            if etapa not in self._janelas:
+                self._janelas[etapa] = deque(maxlen=JANELA_PERCENTIS)
+            self._janelas[etapa].append(segundos)
+            self._somas[etapa] += segundos
+            self._contagens[etapa] += 1
+
+    @contextmanager
+    def etapa(self, nome):
+        inicio = time.monotonic()
+        try:
+            yield
+        finally:
+            self.registrar_etapa(nome, time.monotonic() - inicio)
+
+    def registrar_resultado(self, status, detalhes=""):
+        with self._lock:
+            self.resultados[status] += 1
+            if status == "FALHA":
+                self.falhas_por_motivo[_motivo_curto(detalhes)] += 1
+
+    def registrar_recursos(self, amostra):
+        with self._lock:
+            self.recursos = {
+                "memoria_mb": round(amostra.memoria_mb, 1),
+                "cpu_percentual": round(amostra.cpu_percentual, 1),
+                "processos": amostra.processos,
+            }
+
+    def registrar_reciclagem(self):
+        with self._lock:
+            self.reciclagens += 1
+
+    def duracoes_contato(self, etapas=ETAPAS_RELATORIO):
+        """Duração das etapas do contato atual, na ordem de `etapas` (vazio se não ocorreu)."""
+        return [f"{self.contato_atual[e]:.2f}" if e in self.contato_atual else "" for e in etapas]
+
+    def resumo(self):
+        with self._lock:
+            etapas = {}
+            for etapa, janela in self._janelas.items():
+                ordenados = sorted(janela)
+                etapas[etapa] = {
+                    "p50": round(_percentil(ordenados, 0.5), 3),
+                    "p95": round(_percentil(ordenados, 0.95), 3),
+                    "soma": round(self._somas[etapa], 3),
+                    "contagem": self._contagens[etapa],
+                }
+            return {
+                "inicio": self.inicio.isoformat(timespec="seconds"),
+                "atualizado_em": datetime.now().isoformat(timespec="seconds"),
+                "etapas": etapas,
+                "resultados": dict(self.resultados),
+                "falhas_por_motivo": dict(self.falhas_por_motivo),
+                "navegador": dict(self.recursos, reciclagens=self.reciclagens),
+            }
+
+    def resumo_texto(self):
+        resumo = self.resumo()
+        linhas = [f"{etapa}: p50 {d['p50']:.1f}s | p95 {d['p95']:.1f}s" for etapa, d in resumo["etapas"].items()]
+        if resumo["falhas_por_motivo"]:
+            falhas = ", ".join(f"{motivo} ({n})" for motivo, n in
+                               sorted(resumo["falhas_por_motivo"].items(), key=lambda item: -item[1]))
+            linhas.append(f"Falhas: {falhas}")
+        return "\n".join(linhas)
+
+    def exportar(self, caminho_base):
+        """
+        Grava `<base>.json` e `<base>.prom` (formato texto do Prometheus).
+        Escrita atômica (arquivo temporário + rename) para quem estiver lendo.
+        """
+        resumo = self.resumo()
+        _gravar_atomico(caminho_base + ".json", json.dumps(resumo, ensure_ascii=False, indent=2))
+        _gravar_atomico(caminho_base + ".prom", _formato_prometheus(resumo))
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _formato_prometheus(resumo):
+    linhas = [
+        "# HELP wa_chatbot_etapa_segundos Duração de cada etapa do envio por contato.",
+        "# TYPE wa_chatbot_etapa_segundos summary",
+    ]
+    for etapa, d in resumo["etapas"].items():
+        linhas.append(f'wa_chatbot_etapa_segundos{{etapa="{etapa}",quantile="0.5"}} {d["p50"]}')
+        linhas.append(f'wa_chatbot_etapa_segundos{{etapa="{etapa}",quantile="0.95"}} {d["p95"]}')
+        linhas.append(f'wa_chatbot_etapa_segundos_sum{{etapa="{etapa}"}} {d["soma"]}')
+        linhas.append(f'wa_chatbot_etapa_segundos_count{{etapa="{etapa}"}} {d["contagem"]}')
+    linhas.append("# HELP wa_chatbot_contatos_total Contatos processados por status.")
+    linhas.append("# TYPE wa_chatbot_contatos_total counter")
+    for status, n in resumo["resultados"].items():
+        linhas.append(f'wa_chatbot_contatos_total{{status="{_escapar(status)}"}} {n}')
+    linhas.append("# HELP wa_chatbot_falhas_total Falhas por motivo.")
+    linhas.append("# TYPE wa_chatbot_falhas_total counter")
+    for motivo, n in resumo["falhas_por_motivo"].items():
+        linhas.append(f'wa_chatbot_falhas_total{{motivo="{_escapar(motivo)}"}} {n}')
+    navegador = resumo["navegador"]
+    if "memoria_mb" in navegador:
+        linhas.append("# HELP wa_chatbot_navegador_memoria_mb Memória (RSS) do Chrome e do chromedriver.")
+        linhas.append("# TYPE wa_chatbot_navegador_memoria_mb gauge")
+        linhas.append(f'wa_chatbot_navegador_memoria_mb {navegador["memoria_mb"]}')
+        linhas.append("# HELP wa_chatbot_navegador_cpu_percentual CPU do Chrome e do chromedriver (100 = 1 núcleo).")
+        linhas.append("# TYPE wa_chatbot_navegador_cpu_percentual gauge")
+        linhas.append(f'wa_chatbot_navegador_cpu_percentual {navegador["cpu_percentual"]}')
+    linhas.append("# HELP wa_chatbot_navegador_reciclagens_total Vezes que o navegador foi fechado e reaberto.")
+    linhas.append("# TYPE wa_chatbot_navegador_reciclagens_total counter")
+    linhas.append(f'wa_chatbot_navegador_reciclagens_total {navegador["reciclagens"]}')
+    return "\n".join(linhas) + "\n"
+
+
+def _gravar_atomico(caminho, conteudo):
+    temporario = caminho + ".tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        f.write(conteudo)
+    os.replace(temporario, caminho)
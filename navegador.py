@@ -0,0 +1,104 @@
+import os
+import json
+import shutil
+
+PERFIL_CHROME = "chrome_profile"
+TEMPO_MAXIMO_CARREGAMENTO = 180  # Segundos para o WhatsApp Web carregar (inclui escanear o QR Code)
+CACHE_CHROMEDRIVER = "chromedriver_cache.json"  # Último chromedriver baixado (caminho local)
+ENV_CHROMEDRIVER = "WA_CHROMEDRIVER"  # Caminho fixo do binário, tem prioridade sobre tudo
+ENV_OFFLINE = "WA_CHROMEDRIVER_OFFLINE"  # "1" = nunca baixar o chromedriver
+
+# Pastas de cache do Chrome que podem ser apagadas sem perder o login do WhatsApp
+# (a sessão fica em IndexedDB / Local Storage, que não estão aqui)
+PASTAS_CACHE_PERFIL = [
+    "ShaderCache",
+    "GrShaderCache",
+    "GraphiteDawnCache",
+    "component_crx_cache",
+    os.path.join("Default", "Cache"),
+    os.path.join("Default", "Code Cache"),
+    os.path.join("Default", "GPUCache"),
+    os.path.join("Default", "DawnCache"),
+    os.path.join("Default", "DawnGraphiteCache"),
+    os.path.join("Default", "DawnWebGPUCache"),
+    os.path.join("Default", "Service Worker", "CacheStorage"),
+    os.path.join("Default", "Service Worker", "ScriptCache"),
+]
+
+
+class ChromeDriverIndisponivel(RuntimeError):
+    """Nenhum chromedriver local encontrado e o download está desativado."""
+
+
+def resolver_chromedriver(caminho_fixo=None, permitir_download=True, arquivo_cache=CACHE_CHROMEDRIVER):
+    """
+    Descobre o chromedriver sem ir à internet sempre que possível.
+    Ordem: caminho fixo (parâmetro ou variável WA_CHROMEDRIVER) -> cache local
+    -> chromedriver no PATH -> download pelo webdriver-manager (se permitido e
+    se WA_CHROMEDRIVER_OFFLINE não for "1").
+    Retorna (caminho, origem).
+    """
+    caminho_fixo = caminho_fixo or os.environ.get(ENV_CHROMEDRIVER)
+    if caminho_fixo:
+        if not os.path.isfile(caminho_fixo):
+            raise ChromeDriverIndisponivel(f"chromedriver fixo não encontrado: {caminho_fixo}")
+        return caminho_fixo, "fixo"
+
+    try:
+        with open(arquivo_cache, 'r', encoding='utf-8') as f:
+            caminho = json.load(f).get("caminho")
+        if caminho and os.path.isfile(caminho):
+            return caminho, "cache"
+    except (OSError, ValueError):
+        pass
+
+    caminho = shutil.which("chromedriver")
+    if caminho:
+        return caminho, "PATH"
+
+    if not permitir_download or os.environ.get(ENV_OFFLINE) == "1":
+        raise ChromeDriverIndisponivel(
+            f"Nenhum chromedriver local. Defina {ENV_CHROMEDRIVER} ou permita o download uma vez."
+        )
+
+    from webdriver_manager.chrome import ChromeDriverManager
+    caminho = ChromeDriverManager().install()
+    try:
+        with open(arquivo_cache, 'w', encoding='utf-8') as f:
+            json.dump({"caminho": caminho}, f)
+    except OSError:
+        pass
+    return caminho, "download"
+
+
+def esquecer_chromedriver(arquivo_cache=CACHE_CHROMEDRIVER):
+    """Apaga o cache (ex.: o Chrome foi atualizado e o driver ficou incompatível)."""
+    try:
+        os.remove(arquivo_cache)
+    except OSError:
+        pass
+
+
+def _tamanho_pasta(caminho):
+    total = 0
+    for raiz, _, arquivos in os.walk(caminho):
+        for nome in arquivos:
+            try:
+                total += os.path.getsize(os.path.join(raiz, nome))
+            except OSError:
+                pass
+    return total
+
+
+def limpar_cache_perfil(profile_path=PERFIL_CHROME):
+    """
+    Remove as pastas de cache do perfil, mantendo o login.
+    Retorna quantos bytes foram liberados.
+    """
+    liberados = 0
+    for relativo in PASTAS_CACHE_PERFIL:
+        caminho = os.path.join(profile_path, relativo)
+        if os.path.isdir(caminho):
+            liberados += _tamanho_pasta(caminho)
+            shutil.rmtree(caminho, ignore_errors=True)
+    return liberados
@@ -0,0 +1,41 @@
+from typing import Callable, Optional, Protocol
+
+from controle import SinalControle
+from falhas import ResultadoEnvio
+from metricas import MetricasCampanha
+
+
+class DriverEnvio(Protocol):
+    """
+    O que a WhatsappBotThread precisa de um driver de envio.
+    Implementações: backend.WhatsAppDriver (Chrome real) e driver_falso.DriverFalso (offline).
+
+    A thread substitui `controle` e `metricas` pelos da campanha antes de usar o driver.
+    """
+    controle: SinalControle
+    metricas: MetricasCampanha
+    tempos_inicializacao: dict
+    origem_chromedriver: Optional[str]
+    bytes_cache_liberados: int
+
+    def iniciar_driver(self): ...
+
+    def aguardar_whatsapp_pronto(self, tempo_maximo: float = ...,
+                                 ao_mostrar_qr: Optional[Callable[[], None]] = None) -> str:
+        """Retorna "sessao" ou "qr"; lança exceção se o app não ficar pronto a tempo."""
+        ...
+
+    def enviar_mensagem(self, numero: str, mensagem_final: str) -> ResultadoEnvio:
+        """
+        Retorna (sucesso, detalhes, tipo), com `tipo` em falhas.py. Falhas são
+        retornadas, não lançadas; só OperacaoCancelada (PARAR) sobe como exceção.
+        """
+        ...
+
+    def pid_navegador(self) -> Optional[int]:
+        """PID do processo raiz do navegador (None se não houver um), para medir memória e CPU."""
+        ...
+
+    def fechar(self):
+        """Fecha o navegador; `iniciar_driver()` pode ser chamado de novo depois (reciclagem)."""
+        ...
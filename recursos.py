@@ -0,0 +1,86 @@
+import threading
+from collections import namedtuple
+
+INTERVALO_AMOSTRAGEM = 5  # Segundos entre as medições do navegador
+LIMITE_MEMORIA_MB = 1500  # Acima disso o navegador é reciclado entre dois contatos (0 = nunca)
+RECICLAR_A_CADA = 500  # Contatos entre reciclagens preventivas (0 = nunca)
+
+# Soma do processo do chromedriver e de todos os processos do Chrome abaixo dele
+AmostraRecursos = namedtuple("AmostraRecursos", "memoria_mb cpu_percentual processos")
+
+
+def _psutil():
+    """
+    Import tardio e opcional: sem psutil o monitor fica desligado (o resto funciona),
+    e quem só importa as constantes (ex.: a linha de comando) não paga o import.
+    """
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil
+
+
+class MonitorRecursos:
+    """
+    Mede memória (RSS) e CPU da árvore de processos do navegador a cada
+    `intervalo` segundos, numa thread própria. `obter_pid()` é consultado a
+    cada medição, então o monitor segue o navegador novo depois de uma reciclagem.
+    """
+    def __init__(self, obter_pid, ao_medir=None, intervalo=INTERVALO_AMOSTRAGEM):
+        self.obter_pid = obter_pid
+        self.ao_medir = ao_medir
+        self.intervalo = intervalo
+        self.ultima = None
+        self._processos = {}  # pid -> psutil.Process (o cpu_percent compara com a medição anterior)
+        self._parar = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def disponivel():
+        return _psutil() is not None
+
+    def iniciar(self):
+        if not self.disponivel() or self._thread:
+            return
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+
+    def _loop(self):
+        while not self._parar.wait(self.intervalo):
+            amostra = self.medir()
+            if amostra and self.ao_medir:
+                try:
+                    self.ao_medir(amostra)
+                except Exception as e:
+                    print(f"Erro ao publicar recursos: {e}")
+
+    def medir(self):
+        """Uma medição agora (None sem psutil ou sem navegador aberto)."""
+        pid = self.obter_pid()
+        psutil = _psutil()
+        if psutil is None or not pid:
+            return None
+        try:
+            raiz = psutil.Process(pid)
+            arvore = [raiz] + raiz.children(recursive=True)
+        except psutil.Error:
+            return None
+
+        memoria = cpu = 0.0
+        vistos = {}
+        for processo in arvore:
+            # Reaproveita o objeto da medição anterior para o cálculo de CPU
+            processo = self._processos.get(processo.pid, processo)
+            try:
+                memoria += processo.memory_info().rss
+                cpu += processo.cpu_percent(None)
+            except psutil.Error:
+                continue  # Processo encerrou durante a medição
+            vistos[processo.pid] = processo
+        self._processos = vistos
+        self.ultima = AmostraRecursos(memoria / 1024 / 1024, cpu, len(vistos))
+        return self.ultima
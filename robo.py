@@ -0,0 +1,447 @@
+import os
+import csv
+import random
+import threading
+import time
+from datetime import datetime
+from template_mensagem import compilar_template
+from historico import HistoricoEnvios
+from metricas import MetricasCampanha, ETAPAS_RELATORIO, ETAPA_ENVIO_TOTAL, ETAPA_PAUSA
+from controle import SinalControle, OperacaoCancelada
+from diario import DiarioCampanha
+from navegador import TEMPO_MAXIMO_CARREGAMENTO
+from falhas import ResultadoEnvio, TRANSITORIA, NAVEGADOR_CAIU
+from recursos import MonitorRecursos, LIMITE_MEMORIA_MB, RECICLAR_A_CADA
+from importacao import Contato, ErroImportacao, detectar_formato, contar_contatos, ler_contatos
+from telefones import IndiceNumeros, DDD_PADRAO, DDI_PADRAO
+
+SUFIXO_METRICAS = ".metricas"  # relatorio_envios_X.metricas.json / .prom
+COLUNAS_RELATORIO = (["Telefone", "Nome", "Status", "Detalhes", "DataHora"] + [f"{etapa}_s" for etapa in ETAPAS_RELATORIO]
+                     + ["TipoFalha"])  # Última coluna: relatórios antigos continuam compatíveis
+
+# Ritmo de envio (segundos); os benchmarks zeram estes valores
+ATRASO_ENTRE_ENVIOS = (15, 25)
+PAUSA_A_CADA = 50  # Envios entre as pausas longas (0 = sem pausa longa)
+DURACAO_PAUSA = (300, 600)
+
+# Falhas temporárias ganham uma nova tentativa no fim da campanha ("repescagem").
+# A espera antes de cada uma dobra enquanto as tentativas seguem falhando, até este limite.
+REPESCAGEM_ESPERA_MAXIMA = 300
+QUEDAS_SEGUIDAS_MAXIMO = 3  # Navegador caindo mais vezes seguidas que isso encerra a campanha
+
+def criar_driver(ddd_padrao=DDD_PADRAO, ddi_padrao=DDI_PADRAO, permitir_download=True, limpar_cache=False,
+                 bloquear_midia=False, headless=False):
+    """WhatsAppDriver (Selenium + Chrome), importado só quando o navegador real é usado."""
+    from backend import WhatsAppDriver
+    return WhatsAppDriver(ddd_padrao=ddd_padrao, ddi_padrao=ddi_padrao, permitir_download=permitir_download,
+                          limpar_cache=limpar_cache, bloquear_midia=bloquear_midia, headless=headless)
+
+
+def nome_relatorio_livre(prefixo="relatorio_envios", pasta="."):
+    """relatorio_envios_<data_hora>.csv, com sufixo se já existir (campanhas da fila no mesmo segundo)."""
+    base = os.path.join(pasta, f"{prefixo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    nome, n = f"{base}.csv", 1
+    while os.path.exists(nome):
+        n += 1
+        nome = f"{base}_{n}.csv"
+    return nome
+
+
+# --- THREAD DO ROBÔ ---
+class WhatsappBotThread(threading.Thread):
+    def __init__(self, csv_path, message_template, log_callback, progress_callback, on_finish_callback,
+                 ddd_padrao=DDD_PADRAO, ddi_padrao=DDI_PADRAO, usar_historico=True, diario_retomar=None,
+                 tempo_maximo_carregamento=TEMPO_MAXIMO_CARREGAMENTO, limpar_cache_perfil=False,
+                 permitir_download_driver=True, metrics_callback=None, driver=None,
+                 atraso_entre_envios=ATRASO_ENTRE_ENVIOS, pausa_a_cada=PAUSA_A_CADA, duracao_pausa=DURACAO_PAUSA,
+                 resumo_importacao=None, bloquear_midia=False, limite_memoria_mb=LIMITE_MEMORIA_MB,
+                 reciclar_a_cada=RECICLAR_A_CADA, recursos_callback=None, headless=False,
+                 navegador_aberto=False, fechar_navegador=True, pasta_relatorios="."):
+        """
+        `driver`: qualquer objeto que siga protocolo_driver.DriverEnvio (ex.: driver_falso.DriverFalso).
+        Sem ele, usa o WhatsAppDriver (Selenium + Chrome).
+        `resumo_importacao`: análise já feita no preview (importacao.analisar); se o arquivo
+        não mudou, formato e total são reaproveitados e o CSV não é lido duas vezes.
+        `limite_memoria_mb` / `reciclar_a_cada`: o navegador é fechado e reaberto (mesmo perfil)
+        entre dois contatos quando passa do limite de memória ou a cada N contatos (0 = nunca).
+        `navegador_aberto` / `fechar_navegador`: para reaproveitar o mesmo navegador entre
+        campanhas (ver fila.FilaCampanhas), que abre e fecha o driver uma vez só.
+        `pasta_relatorios`: onde ficam relatório, diário e métricas (a simulação usa uma pasta à parte).
+        """
+        super().__init__()
+        # Retomada: CSV, mensagem e formatação vêm do diário da campanha original
+        self.diario_retomar = diario_retomar
+        if diario_retomar:
+            csv_path = diario_retomar.cabecalho["csv"]
+            message_template = diario_retomar.cabecalho["mensagem"]
+            ddd_padrao = diario_retomar.cabecalho.get("ddd_padrao", ddd_padrao)
+            ddi_padrao = diario_retomar.cabecalho.get("ddi_padrao", ddi_padrao)
+        self.csv_path = csv_path
+        self.message_template = message_template
+        self.ddd_padrao = ddd_padrao
+        self.ddi_padrao = ddi_padrao
+        self.usar_historico = usar_historico
+        self.resumo_importacao = resumo_importacao
+        self.tempo_maximo_carregamento = tempo_maximo_carregamento
+        self.log_callback = log_callback
+        self.progress_callback = progress_callback 
+        self.on_finish_callback = on_finish_callback
+        self.metrics_callback = metrics_callback
+        self.metricas = MetricasCampanha()
+        self.is_running = False
+        # Pausa/parada por evento: todas as esperas (aqui e no driver) reagem na hora
+        self.controle = SinalControle()
+        self.atraso_entre_envios = atraso_entre_envios
+        self.pausa_a_cada = pausa_a_cada
+        self.duracao_pausa = duracao_pausa
+        self.limite_memoria_mb = limite_memoria_mb
+        self.reciclar_a_cada = reciclar_a_cada
+        self.recursos_callback = recursos_callback
+        self.navegador_aberto = navegador_aberto
+        self.fechar_navegador = fechar_navegador
+        self.pasta_relatorios = pasta_relatorios
+        self.nome_relatorio = None
+        self.contatos_desde_abertura = 0  # Envios no navegador atual (para a reciclagem)
+        self.quedas_seguidas = 0
+        self.erro = None  # Exceção que encerrou a campanha (None = terminou ou foi parada)
+        if driver is None:
+            driver = criar_driver(ddd_padrao, ddi_padrao, permitir_download_driver, limpar_cache_perfil,
+                                  bloquear_midia, headless)
+        # O driver compartilha o token de parada e as métricas desta campanha
+        driver.controle = self.controle
+        driver.metricas = self.metricas
+        self.driver_manager = driver
+        # Memória/CPU do navegador, medidas em segundo plano
+        self.monitor = MonitorRecursos(lambda: self.driver_manager.pid_navegador(), ao_medir=self.ao_medir_recursos)
+
+    def run(self):
+        self.is_running = True
+        historico = None
+        diario = self.diario_retomar
+        
+        try:
+            if diario and diario.csv_alterado():
+                # A retomada continua num offset em bytes: num arquivo editado cairia no meio de uma linha
+                raise ErroImportacao("O CSV mudou desde o início da campanha; não dá para retomar "
+                                     "(inicie uma nova campanha com o arquivo atual).")
+            # Formato do CSV e mensagem validados antes de abrir o navegador
+            resumo = self.resumo_importacao
+            if resumo and not resumo.vale_para(self.csv_path, self.ddd_padrao, self.ddi_padrao):
+                resumo = None
+            formato = resumo.formato if resumo else detectar_formato(self.csv_path)
+            self.log_callback(f"📄 Formato do CSV: {formato.descricao()}")
+
+            # Sintaxe validada aqui, não no meio da campanha; {palavra} que não é coluna vira texto
+            template = compilar_template(self.message_template, campos_validos=formato.campos)
+            if template.campos_como_texto:
+                nomes = ", ".join(f"{{{nome}}}" for nome in template.campos_como_texto)
+                self.log_callback(f"⚠️ Não são colunas do CSV e serão enviados como texto: {nomes}")
+
+            if diario:
+                nome_relatorio = diario.cabecalho["relatorio"]
+            else:
+                nome_relatorio = nome_relatorio_livre(pasta=self.pasta_relatorios)
+            self.nome_relatorio = nome_relatorio
+
+            # Histórico/opt-out: consultado antes de cada contato (sem navegador)
+            if self.usar_historico:
+                historico = HistoricoEnvios(ddd_padrao=self.ddd_padrao, ddi_padrao=self.ddi_padrao)
+                importados = historico.importar_relatorios()
+                optouts = historico.importar_optout()
+                if importados or optouts:
+                    self.log_callback(f"🗃️ Histórico: {importados} resultados importados, {optouts} números em opt-out.")
+                historico.marcar_importado(nome_relatorio)
+
+            if not self.navegador_aberto:
+                self.abrir_navegador()
+                self.navegador_aberto = True
+            if not self.monitor.disponivel():
+                self.log_callback("ℹ️ psutil não instalado: memória do navegador não será medida "
+                                  "(reciclagem só pela contagem de contatos).")
+            self.monitor.iniciar()
+            
+            indice = IndiceNumeros()
+            if diario:
+                # Retomada: total e números já processados vêm do diário,
+                # e a leitura do CSV começa direto no offset salvo
+                total = diario.total
+                for numero_processado in diario.numeros:
+                    indice.registrar(numero_processado)
+                inicio, offset = diario.proximo_indice, diario.offset
+                self.log_callback(f"♻️ Retomando campanha: {inicio}/{total} contatos já processados.")
+                if diario.adiados:
+                    self.log_callback(f"🔁 {len(diario.adiados)} contatos adiados aguardam a repescagem.")
+                self.progress_callback(inicio, total, status="Retomando...")
+            else:
+                # Contagem separada (ou reaproveitada do preview): a lista nunca fica inteira em memória
+                if resumo:
+                    total, duplicados = resumo.total, resumo.duplicados
+                else:
+                    total, duplicados = contar_contatos(self.csv_path, formato, self.ddd_padrao, self.ddi_padrao)
+                self.log_callback(f"📂 Lista carregada: {total} contatos.")
+                if duplicados:
+                    self.log_callback(f"♻️ {duplicados} números repetidos serão ignorados.")
+                inicio, offset = 0, 0
+                diario = DiarioCampanha.criar(nome_relatorio, self.csv_path, self.message_template, total,
+                                              ddd_padrao=self.ddd_padrao, ddi_padrao=self.ddi_padrao)
+
+            with open(nome_relatorio, 'a' if inicio else 'w', encoding='utf-8', newline='') as f_out:
+                escritor = csv.writer(f_out, delimiter=';')
+                if not inicio:
+                    escritor.writerow(COLUNAS_RELATORIO)
+
+                contatos = ler_contatos(self.csv_path, formato, self.ddd_padrao, self.ddi_padrao,
+                                        indice=indice, inicio=offset)
+                enviados = 0
+                # Falhas temporárias (índice, contato), tentadas no fim; numa retomada vêm do diário
+                adiados = [(n, Contato(**campos)) for n, campos in diario.adiados]
+                for i, contato in enumerate(contatos, start=inicio):
+                    numero, nome, normalizado, offset = contato.numero, contato.nome, contato.normalizado, contato.offset
+                    # Bloqueia enquanto pausado; False = PARAR
+                    if not self.controle.esperar(0):
+                        self.log_callback("🛑 Processo abortado.")
+                        break
+
+                    self.metricas.novo_contato()
+                    if not contato.valido:
+                        motivo_pulo = "Número mal formatado (sem DDI+DDD+número)"
+                    else:
+                        motivo_pulo = historico.motivo_para_pular(numero) if historico else None
+                    if motivo_pulo:
+                        diario.registrar(i, offset, normalizado)
+                        self.log_callback(f"⏭️ ({i+1}/{total}) {numero}: {motivo_pulo}")
+                        escritor.writerow(self.linha_relatorio(numero, nome, "IGNORADO", motivo_pulo))
+                        f_out.flush()
+                        self.progress_callback(i + 1, total, status="Rodando")
+                        continue
+
+                    # Reciclagem entre dois contatos: o próximo já vai para o navegador novo
+                    motivo_reciclagem = self.motivo_para_reciclar()
+                    if motivo_reciclagem:
+                        self.progress_callback(i, total, status="Reciclando navegador...")
+                        self.reciclar_navegador(motivo_reciclagem)
+
+                    self.log_callback(f"🔄 ({i+1}/{total}) Enviando para: {numero}...")
+
+                    # Pausa longa a cada `pausa_a_cada` envios
+                    if self.pausa_a_cada and (enviados + 1) % self.pausa_a_cada == 0 and i < total - 1:
+                        tempo_pausa = random.randint(*self.duracao_pausa)
+                        minutos = tempo_pausa // 60
+                        self.log_callback(f"☕ Pausa de segurança: descansando por {minutos} min...")
+                        self.progress_callback(i, total, status=f"Em pausa ({minutos} min)...")
+                        if not self.controle.esperar(tempo_pausa):
+                            self.log_callback("🛑 Processo abortado.")
+                            break
+
+                    # Registrado antes do envio: uma retomada nunca repete este contato
+                    diario.registrar(i, offset, normalizado)
+
+                    # Envio
+                    try:
+                        resultado = self.enviar_contato(contato, template)
+                    except OperacaoCancelada:
+                        escritor.writerow(self.linha_relatorio(numero, nome, "CANCELADO",
+                                                               "Interrompido pelo usuário durante o envio"))
+                        self.log_callback("🛑 Processo abortado.")
+                        break
+                    enviados += 1
+
+                    if resultado.tipo == TRANSITORIA:
+                        # Sem histórico por enquanto: quem decide é a nova tentativa
+                        diario.adiar(i, contato._asdict())
+                        adiados.append((i, contato))
+                        self.log_callback(f"🔁 {numero}: {resultado.detalhes} (nova tentativa no fim da campanha)")
+                        escritor.writerow(self.linha_relatorio(numero, nome, "ADIADO", resultado.detalhes,
+                                                               resultado.tipo))
+                        f_out.flush()
+                        self.publicar_metricas(nome_relatorio)
+                    else:
+                        self.registrar_envio(escritor, f_out, historico, contato, resultado)
+
+                    self.progress_callback(i + 1, total, status="Aguardando delay...")
+
+                    if i < total - 1:
+                        tempo_espera = random.uniform(*self.atraso_entre_envios)
+                        self.log_callback(f"⏳ Aguardando {tempo_espera:.1f}s...")
+                        with self.metricas.etapa(ETAPA_PAUSA):
+                            self.controle.esperar(tempo_espera)
+                else:
+                    # Lista percorrida até o fim: só falta a repescagem (o diário só termina depois dela)
+                    if self.repescar(adiados, diario, template, escritor, f_out, historico, total):
+                        diario.finalizar()
+
+            self.publicar_metricas(nome_relatorio)
+
+        except OperacaoCancelada:
+            self.log_callback("🛑 Processo abortado.")
+        except Exception as e:
+            self.erro = e
+            self.log_callback(f"💀 Erro Crítico: {str(e)}")
+        finally:
+            self.monitor.parar()
+            if historico:
+                historico.fechar()
+            if diario:
+                diario.fechar()
+            self.log_callback("🏁 Processo finalizado.")
+            if self.fechar_navegador:
+                self.driver_manager.fechar()
+                self.navegador_aberto = False
+            self.is_running = False
+            self.on_finish_callback()
+
+    def abrir_navegador(self):
+        self.log_callback("🚀 Inicializando navegador...")
+        self.contatos_desde_abertura = 0
+        self.driver_manager.iniciar_driver()
+        self.log_inicializacao()
+        self.log_callback(f"✅ Navegador aberto. Aguardando o WhatsApp Web (até {self.tempo_maximo_carregamento}s)...")
+        inicio_carregamento = time.monotonic()
+        estado = self.driver_manager.aguardar_whatsapp_pronto(
+            tempo_maximo=self.tempo_maximo_carregamento,
+            ao_mostrar_qr=lambda: self.log_callback("📱 QR Code na tela: escaneie com o celular para continuar..."),
+        )
+        origem = "login pelo QR Code" if estado == "qr" else "sessão salva"
+        self.log_callback(f"✅ WhatsApp pronto em {time.monotonic() - inicio_carregamento:.1f}s ({origem}).")
+
+    def enviar_contato(self, contato, template):
+        """
+        Envia para um contato. Se o navegador caiu, ele é reaberto aqui (a campanha segue
+        no próximo contato); quedas seguidas demais viram erro da campanha.
+        """
+        with self.metricas.etapa(ETAPA_ENVIO_TOTAL):
+            resultado = ResultadoEnvio(*self.driver_manager.enviar_mensagem(
+                numero=contato.numero,
+                mensagem_final=template.renderizar(contato.campos),
+            ))
+        self.contatos_desde_abertura += 1
+        if resultado.tipo != NAVEGADOR_CAIU:
+            self.quedas_seguidas = 0
+            return resultado
+
+        self.quedas_seguidas += 1
+        if self.quedas_seguidas > QUEDAS_SEGUIDAS_MAXIMO:
+            raise RuntimeError(f"Navegador caiu {self.quedas_seguidas} vezes seguidas ({resultado.detalhes})")
+        # O contato não é repetido: a mensagem pode ter saído antes da queda
+        self.log_callback(f"💥 {contato.numero}: {resultado.detalhes}")
+        self.reciclar_navegador("navegador caiu")
+        return resultado
+
+    def registrar_envio(self, escritor, f_out, historico, contato, resultado, detalhes=None):
+        """Resultado final de um envio: histórico, log, relatório e métricas."""
+        detalhes = detalhes or resultado.detalhes
+        if historico:
+            historico.registrar(contato.numero, resultado.sucesso, detalhes, tipo_falha=resultado.tipo)
+        status_str = "SUCESSO" if resultado.sucesso else "FALHA"
+        icon = "✅" if resultado.sucesso else "❌"
+        self.log_callback(f"{icon} {contato.numero}: {detalhes}")
+        escritor.writerow(self.linha_relatorio(contato.numero, contato.nome, status_str, detalhes,
+                                               "" if resultado.sucesso else resultado.tipo))
+        f_out.flush()
+        self.publicar_metricas(self.nome_relatorio)
+
+    def repescar(self, adiados, diario, template, escritor, f_out, historico, total):
+        """
+        Uma nova tentativa para cada contato com falha temporária. A espera antes de cada
+        uma é o atraso normal, dobrado a cada falha seguida (limitado a REPESCAGEM_ESPERA_MAXIMA).
+        Retorna False se foi parada no meio (a retomada continua a partir do diário).
+        """
+        if not adiados:
+            return True
+        self.log_callback(f"🔁 Repescagem: nova tentativa para {len(adiados)} contatos com falha temporária.")
+        falhas_seguidas = 0
+        for n, (indice, contato) in enumerate(adiados, start=1):
+            espera = min(random.uniform(*self.atraso_entre_envios) * 2 ** min(falhas_seguidas, 10),
+                         REPESCAGEM_ESPERA_MAXIMA)
+            self.progress_callback(total, total, status=f"Repescagem ({n}/{len(adiados)})...")
+            if espera:
+                self.log_callback(f"⏳ Aguardando {espera:.1f}s...")
+            with self.metricas.etapa(ETAPA_PAUSA):
+                if not self.controle.esperar(espera):
+                    self.log_callback("🛑 Processo abortado.")
+                    return False
+
+            self.metricas.novo_contato()
+            self.log_callback(f"🔄 (repescagem {n}/{len(adiados)}) Enviando para: {contato.numero}...")
+            diario.repescar(indice)
+            try:
+                resultado = self.enviar_contato(contato, template)
+            except OperacaoCancelada:
+                escritor.writerow(self.linha_relatorio(contato.numero, contato.nome, "CANCELADO",
+                                                       "Interrompido pelo usuário durante o envio"))
+                self.log_callback("🛑 Processo abortado.")
+                return False
+            falhas_seguidas = falhas_seguidas + 1 if resultado.tipo == TRANSITORIA else 0
+            detalhes = resultado.detalhes if resultado.sucesso else f"{resultado.detalhes} (2ª tentativa)"
+            self.registrar_envio(escritor, f_out, historico, contato, resultado, detalhes)
+        return True
+
+    def motivo_para_reciclar(self):
+        """Motivo para fechar e reabrir o navegador antes do próximo contato (None = seguir)."""
+        if self.reciclar_a_cada and self.contatos_desde_abertura >= self.reciclar_a_cada:
+            return f"{self.contatos_desde_abertura} contatos desde a última abertura"
+        amostra = self.monitor.ultima
+        if self.limite_memoria_mb and amostra and amostra.memoria_mb >= self.limite_memoria_mb:
+            return f"memória em {amostra.memoria_mb:.0f} MB (limite {self.limite_memoria_mb} MB)"
+        return None
+
+    def reciclar_navegador(self, motivo):
+        """
+        Fecha e reabre o navegador no mesmo perfil (a sessão do WhatsApp continua).
+        A posição na lista não muda: o laço segue no mesmo contato.
+        """
+        self.log_callback(f"♻️ Reciclando o navegador: {motivo}.")
+        try:
+            self.driver_manager.fechar()
+        except Exception as e:
+            # Navegador que caiu ou travou pode falhar ao fechar; o novo abre mesmo assim
+            self.log_callback(f"⚠️ Erro ao fechar o navegador: {e}")
+        self.monitor.ultima = None  # A medição antiga era do navegador fechado
+        self.metricas.registrar_reciclagem()
+        self.abrir_navegador()
+
+    def ao_medir_recursos(self, amostra):
+        self.metricas.registrar_recursos(amostra)
+        if self.recursos_callback:
+            self.recursos_callback(f"Chrome: {amostra.memoria_mb:.0f} MB | CPU {amostra.cpu_percentual:.0f}% "
+                                   f"| {amostra.processos} processos")
+
+    def linha_relatorio(self, numero, nome, status, detalhes, tipo_falha=""):
+        """Linha do relatório com data/hora ISO, o tempo de cada etapa do contato e o tipo de falha."""
+        self.metricas.registrar_resultado(status, detalhes)
+        data_hora = datetime.now().isoformat(timespec="seconds")
+        return [numero, nome, status, detalhes, data_hora] + self.metricas.duracoes_contato() + [tipo_falha]
+
+    def publicar_metricas(self, nome_relatorio):
+        """Exporta JSON/Prometheus ao lado do relatório e atualiza o resumo na tela."""
+        try:
+            self.metricas.exportar(os.path.splitext(nome_relatorio)[0] + SUFIXO_METRICAS)
+        except OSError as e:
+            self.log_callback(f"⚠️ Não foi possível gravar as métricas: {e}")
+        if self.metrics_callback:
+            self.metrics_callback(self.metricas.resumo_texto())
+
+    def log_inicializacao(self):
+        dm = self.driver_manager
+        if dm.bytes_cache_liberados:
+            self.log_callback(f"🧹 Cache do perfil limpo: {dm.bytes_cache_liberados / 1024 / 1024:.1f} MB liberados.")
+        etapas = " | ".join(f"{etapa}: {segundos:.1f}s" for etapa, segundos in dm.tempos_inicializacao.items())
+        self.log_callback(f"⏱️ Inicialização ({dm.origem_chromedriver} chromedriver) → {etapas}")
+
+    @property
+    def is_paused(self):
+        return self.controle.pausado
+
+    @property
+    def stop_signal(self):
+        return self.controle.parado
+
+    def pause(self):
+        self.controle.pausar()
+        self.log_callback("⏸️ Pausado.")
+    def resume(self):
+        self.controle.retomar()
+        self.log_callback("▶️ Retomado.")
+    def stop(self):
+        self.controle.parar()
+        self.log_callback("⚠️ Parando...")
@@ -0,0 +1,59 @@
+import re
+
+# Padrões usados quando o número vem sem DDD/DDI (podem ser trocados na interface)
+DDD_PADRAO = "62"
+DDI_PADRAO = "55"
+
+_NAO_DIGITO = re.compile(r'[^0-9]+')
+
+
+def normalizar_numero(numero_raw, ddd_padrao=DDD_PADRAO, ddi_padrao=DDI_PADRAO):
+    """
+    Limpa o número e garante o formato DDI + DDD + Numero.
+    Não insere o dígito 9, apenas o DDD se estiver faltando.
+    """
+    nums = _NAO_DIGITO.sub("", str(numero_raw))
+
+    # 8 dígitos (fixo) ou 9 dígitos (celular) sem DDD
+    if len(nums) in (8, 9):
+        nums = ddd_padrao + nums
+
+    # 10 (fixo + DDD) ou 11 (celular + DDD) dígitos: falta o DDI
+    if len(nums) in (10, 11):
+        nums = ddi_padrao + nums
+
+    return nums
+
+
+def normalizar_lote(numeros, ddd_padrao=DDD_PADRAO, ddi_padrao=DDI_PADRAO):
+    """Normaliza uma coluna inteira (mesma regra de normalizar_numero; usado no benchmark)."""
+    return [normalizar_numero(n, ddd_padrao, ddi_padrao) for n in numeros]
+
+
+def numero_valido(nums, ddi_padrao=DDI_PADRAO):
+    # Depois da normalização só sobram DDI + DDD + 8/9 dígitos
+    return nums.startswith(ddi_padrao) and len(nums) - len(ddi_padrao) in (10, 11)
+
+
+class IndiceNumeros:
+    """
+    Índice (hash) dos números já vistos na lista, para descartar repetidos
+    antes do envio.
+    """
+    def __init__(self):
+        self._vistos = set()
+        self.duplicados = 0
+
+    def registrar(self, numero_normalizado):
+        """Retorna True se o número é novo, False se já apareceu antes."""
+        if numero_normalizado in self._vistos:
+            self.duplicados += 1
+            return False
+        self._vistos.add(numero_normalizado)
+        return True
+
+    def __contains__(self, numero_normalizado):
+        return numero_normalizado in self._vistos
+
+    def __len__(self):
+        return len(self._vistos)
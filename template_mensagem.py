@@ -0,0 +1,210 @@
+import random
+import re
+
+# Placeholders válidos: {nome}, {cidade}, {data_nascimento}...
+PADRAO_CAMPO = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+class ErroTemplate(ValueError):
+    """Mensagem com sintaxe inválida (chaves desbalanceadas, campo desconhecido...)."""
+
+
+class Literal:
+    __slots__ = ("texto",)
+
+    def __init__(self, texto):
+        self.texto = texto
+
+
+class Campo:
+    __slots__ = ("nome",)
+
+    def __init__(self, nome):
+        self.nome = nome
+
+
+class Escolha:
+    __slots__ = ("opcoes",)
+
+    def __init__(self, opcoes):
+        self.opcoes = opcoes  # Lista de sequências de nós
+
+
+class Template:
+    """
+    Mensagem já compilada: a árvore de literais, escolhas (spintax) e campos
+    é montada uma vez só, e cada contato apenas percorre a árvore.
+    """
+    def __init__(self, texto, nos):
+        self.texto = texto
+        self.nos = nos
+        self.campos_como_texto = []  # {palavra} que não é coluna e foi mantida como texto (para avisar)
+
+    @property
+    def campos(self):
+        encontrados = set()
+        pilha = [self.nos]
+        while pilha:
+            for no in pilha.pop():
+                if isinstance(no, Campo):
+                    encontrados.add(no.nome)
+                elif isinstance(no, Escolha):
+                    pilha.extend(no.opcoes)
+        return encontrados
+
+    def renderizar(self, campos=None, rng=None, seed=None):
+        """
+        Gera o texto final para um contato.
+        `seed` (ou um `random.Random` em `rng`) torna o resultado reproduzível,
+        útil no preview da interface e em benchmarks.
+        """
+        if rng is None:
+            rng = random.Random(seed) if seed is not None else random
+        partes = []
+        _renderizar(self.nos, campos or {}, rng, partes)
+        return "".join(partes)
+
+
+def _renderizar(nos, campos, rng, partes):
+    for no in nos:
+        if isinstance(no, Literal):
+            partes.append(no.texto)
+        elif isinstance(no, Campo):
+            # Coluna existente (mesmo vazia) vira o valor; nome desconhecido fica como texto: {Oi} -> "Oi"
+            partes.append(campos.get(no.nome) or "" if no.nome in campos else no.nome)
+        else:
+            _renderizar(rng.choice(no.opcoes), campos, rng, partes)
+
+
+def compilar_template(texto, campos_validos=None):
+    """
+    Converte a mensagem em um Template.
+    - {nome}, {cidade}: campo do CSV (qualquer coluna).
+    - {Oi|Olá} ou {Oi/Olá}: escolha aleatória, pode ser aninhada: {Oi|{Olá|E aí}}.
+    - {texto qualquer}: sem separador e sem ser campo, fica o próprio texto.
+    Se `campos_validos` for informado, uma palavra entre chaves que não é coluna
+    ({Oi}, {Obrigado}) vira texto, como no spintax antigo; os nomes ficam em
+    `template.campos_como_texto`, para avisar antes do envio (pode ser erro de digitação).
+    """
+    nos, pos = _parse_sequencia(texto, 0, dentro_grupo=False)
+    if pos != len(texto):
+        raise ErroTemplate(f"'}}' sem '{{' correspondente na posição {pos + 1}.")
+    template = Template(texto, nos)
+
+    if campos_validos is not None:
+        trocados = set()
+        template.nos = _campos_como_texto(nos, set(campos_validos), trocados)
+        template.campos_como_texto = sorted(trocados)
+    return template
+
+
+def _campos_como_texto(nos, campos_validos, trocados):
+    """Troca Campo fora de `campos_validos` por Literal com o próprio nome (anotado em `trocados`)."""
+    resultado = []
+    for no in nos:
+        if isinstance(no, Campo) and no.nome not in campos_validos:
+            trocados.add(no.nome)
+            no = Literal(no.nome)
+        elif isinstance(no, Escolha):
+            no = Escolha([_campos_como_texto(opcao, campos_validos, trocados) for opcao in no.opcoes])
+        resultado.append(no)
+    return resultado
+
+
+def _parse_sequencia(texto, pos, dentro_grupo):
+    """
+    Lê nós até o fim do texto ou, dentro de um grupo, até '|', '/' ou '}'.
+    Retorna (nos, posição onde parou).
+    """
+    nos = []
+    buffer = []
+    n = len(texto)
+    while pos < n:
+        c = texto[pos]
+        if c == '{':
+            if buffer:
+                nos.append(Literal("".join(buffer)))
+                buffer = []
+            no, pos = _parse_grupo(texto, pos)
+            nos.append(no)
+            continue
+        if c == '}':
+            break
+        if dentro_grupo and c in '|/':
+            break
+        buffer.append(c)
+        pos += 1
+    if buffer:
+        nos.append(Literal("".join(buffer)))
+    return nos, pos
+
+
+def _parse_grupo(texto, inicio):
+    """Lê um grupo `{...}` começando em `inicio` (que aponta para '{')."""
+    opcoes = []
+    separadores = set()
+    pos = inicio + 1
+    while True:
+        nos, pos = _parse_sequencia(texto, pos, dentro_grupo=True)
+        opcoes.append(nos)
+        if pos >= len(texto):
+            raise ErroTemplate(f"'{{' aberto na posição {inicio + 1} não foi fechado.")
+        c = texto[pos]
+        pos += 1
+        if c == '}':
+            break
+        separadores.add(c)
+
+    bruto = texto[inicio + 1:pos - 1]
+
+    # Separador único: pode ser um campo ou texto entre chaves
+    if len(opcoes) == 1:
+        conteudo = bruto.strip()
+        if PADRAO_CAMPO.match(conteudo):
+            return Campo(conteudo), pos
+        return Escolha([_aparar(opcoes[0])]), pos
+
+    # Mesmo comportamento antigo: com '|' presente, a '/' é texto normal
+    if '|' in separadores and '/' in separadores:
+        opcoes = _resplit(texto, inicio, pos)
+    return Escolha([_aparar(o) for o in opcoes]), pos
+
+
+def _resplit(texto, inicio, fim):
+    """Refaz o grupo considerando apenas '|' como separador."""
+    opcoes = []
+    atual = []
+    buffer = []
+    pos = inicio + 1
+    while pos < fim - 1:
+        c = texto[pos]
+        if c == '{':
+            if buffer:
+                atual.append(Literal("".join(buffer)))
+                buffer = []
+            no, pos = _parse_grupo(texto, pos)
+            atual.append(no)
+            continue
+        if c == '|':
+            if buffer:
+                atual.append(Literal("".join(buffer)))
+                buffer = []
+            opcoes.append(atual)
+            atual = []
+        else:
+            buffer.append(c)
+        pos += 1
+    if buffer:
+        atual.append(Literal("".join(buffer)))
+    opcoes.append(atual)
+    return opcoes
+
+
+def _aparar(nos):
+    """Remove espaços nas pontas de uma opção (como o strip() do spintax antigo)."""
+    nos = list(nos)
+    if nos and isinstance(nos[0], Literal):
+        nos[0] = Literal(nos[0].texto.lstrip())
+    if nos and isinstance(nos[-1], Literal):
+        nos[-1] = Literal(nos[-1].texto.rstrip())
+    return [n for n in nos if not (isinstance(n, Literal) and not n.texto)]
@@ -0,0 +1,270 @@
+"""
+Linha de comando (sem interface gráfica), para servidores sem tela.
+
+    python -m wa_chatbot validate contatos.csv --mensagem "Olá {nome}!"
+    python -m wa_chatbot preview contatos.csv --mensagem-arquivo msg.txt -n 5
+    python -m wa_chatbot run contatos.csv --mensagem-arquivo msg.txt --headless --log campanha.log
+    python -m wa_chatbot run --retomar
+
+`validate` e `preview` só leem o CSV e a mensagem: Selenium, Flet e o
+navegador nunca são importados. `run` usa a mesma WhatsappBotThread da interface.
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+
+from telefones import DDD_PADRAO, DDI_PADRAO
+
+INTERVALO_PROGRESSO = 5  # Segundos entre linhas de progresso repetidas (mesmo status)
+INTERVALO_RESUMO = 60  # Segundos entre resumos de métricas/memória (com --metricas)
+# Relatórios e diários do --simular: fora da pasta das campanhas reais, para que não sejam
+# importados no histórico nem oferecidos em "Retomar campanha"
+PASTA_SIMULACAO = "simulacoes"
+
+
+class SaidaTerminal:
+    """
+    Callbacks de log/progresso da WhatsappBotThread escrevendo em stdout (ou num arquivo).
+    O log completo continua indo também para logs/wa_chatbot.log (logs.RegistroLog).
+    """
+    def __init__(self, destino=None):
+        from logs import RegistroLog
+        self.registro = RegistroLog()
+        self._arquivo = open(destino, 'a', encoding='utf-8') if destino else None
+        self._saida = self._arquivo or sys.stdout
+        self._ultimo_status = None
+        self._ultimo_progresso = 0.0
+        self._metricas = self._recursos = None
+        self._ultimo_resumo = time.monotonic()
+
+    def _escrever(self, texto):
+        self._saida.write(f"[{datetime.now().strftime('%H:%M:%S')}] {texto}\n")
+        self._saida.flush()
+
+    def log(self, message):
+        self.registro.adicionar(message)
+        self._escrever(message)
+
+    def progresso(self, current, total, status="Rodando"):
+        # Uma linha quando o status muda ou a cada INTERVALO_PROGRESSO segundos
+        agora = time.monotonic()
+        if status == self._ultimo_status and agora - self._ultimo_progresso < INTERVALO_PROGRESSO:
+            return
+        self._ultimo_status, self._ultimo_progresso = status, agora
+        percentual = int(current / total * 100) if total else 0
+        self._escrever(f"📈 {current}/{total} ({percentual}%) | {status}")
+
+    def metricas(self, texto):
+        self._metricas = texto
+        self._talvez_resumo()
+
+    def recursos(self, texto):
+        self._recursos = texto
+        self._talvez_resumo()
+
+    def _talvez_resumo(self, agora_mesmo=False):
+        # A thread publica a cada contato / 5 s; no terminal basta um resumo por minuto
+        if not agora_mesmo and time.monotonic() - self._ultimo_resumo < INTERVALO_RESUMO:
+            return
+        self._ultimo_resumo = time.monotonic()
+        for texto in (self._metricas, self._recursos):
+            for linha in (texto or "").splitlines():
+                self._escrever(f"   📊 {linha}")
+
+    def fechar(self):
+        self._talvez_resumo(agora_mesmo=True)
+        if self._arquivo:
+            self._arquivo.close()
+
+
+def _ler_mensagem(args):
+    if args.mensagem_arquivo:
+        with open(args.mensagem_arquivo, 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    return args.mensagem
+
+
+def _analisar(args):
+    """Formato, resumo e template compilado; lança ErroImportacao/ErroTemplate."""
+    from importacao import detectar_formato, analisar
+    from template_mensagem import compilar_template
+
+    formato = detectar_formato(args.csv)
+    resumo = analisar(args.csv, args.ddd, args.ddi, formato)
+    mensagem = _ler_mensagem(args)
+    template = compilar_template(mensagem, campos_validos=formato.campos) if mensagem else None
+    return resumo, template
+
+
+def comando_validate(args):
+    from importacao import ErroImportacao
+    from template_mensagem import ErroTemplate
+
+    try:
+        resumo, template = _analisar(args)
+    except (ErroImportacao, ErroTemplate, OSError) as err:
+        print(f"❌ {err}")
+        return 1
+    print(f"📄 Formato: {resumo.formato.descricao()}")
+    print(f"📂 {resumo.total} contatos | {resumo.invalidos} números inválidos | {resumo.duplicados} repetidos")
+    if template:
+        print(f"✅ Mensagem válida (campos: {', '.join(sorted(template.campos)) or 'nenhum'})")
+        if template.campos_como_texto:
+            nomes = ", ".join(f"{{{nome}}}" for nome in template.campos_como_texto)
+            print(f"⚠️ Não são colunas do CSV e serão enviados como texto: {nomes}")
+    if resumo.total - resumo.invalidos <= 0:
+        print("❌ Nenhum contato válido para envio.")
+        return 1
+    return 0
+
+
+def comando_preview(args):
+    from importacao import ErroImportacao, ler_contatos
+    from template_mensagem import ErroTemplate
+    from telefones import IndiceNumeros
+
+    try:
+        resumo, template = _analisar(args)
+    except (ErroImportacao, ErroTemplate, OSError) as err:
+        print(f"❌ {err}")
+        return 1
+    if not template:
+        print("❌ Informe --mensagem ou --mensagem-arquivo.")
+        return 1
+
+    contatos = ler_contatos(args.csv, resumo.formato, args.ddd, args.ddi, indice=IndiceNumeros())
+    for n, contato in enumerate(contatos):
+        if n >= args.quantidade:
+            break
+        aviso = "" if contato.valido else "  ⚠️ inválido"
+        print(f"--- {contato.numero} → {contato.normalizado}{aviso}")
+        print(template.renderizar(contato.campos, seed=args.seed + n))
+    return 0
+
+
+def comando_run(args):
+    import signal
+    from diario import ultimo_diario_pendente
+
+    diario = None
+    pasta = PASTA_SIMULACAO if args.simular else "."
+    if args.retomar:
+        diario = ultimo_diario_pendente(pasta)
+        if not diario:
+            print("ℹ️ Nenhuma campanha interrompida para retomar.")
+            return 1
+    elif not args.csv:
+        print("❌ Informe o CSV (ou --retomar).")
+        return 2
+    else:
+        mensagem = _ler_mensagem(args)
+        if not mensagem:
+            print("❌ Informe --mensagem ou --mensagem-arquivo.")
+            return 2
+
+    # Import tardio: a thread (e o Selenium, ao abrir o navegador) só quando há campanha
+    from robo import WhatsappBotThread
+
+    driver, ritmo = None, {}
+    usar_historico = not args.sem_historico
+    if args.simular:
+        # Sem Chrome e sem esperas: só o fluxo (relatório e diário em PASTA_SIMULACAO).
+        # Sem histórico: resultados falsos não podem pular contatos das campanhas reais
+        from driver_falso import DriverFalso
+        driver = DriverFalso(ddd_padrao=args.ddd, ddi_padrao=args.ddi)
+        ritmo = {"atraso_entre_envios": (0, 0), "pausa_a_cada": 0}
+        usar_historico = False
+        os.makedirs(pasta, exist_ok=True)
+
+    saida = SaidaTerminal(args.log)
+    bot = WhatsappBotThread(
+        csv_path=diario.cabecalho["csv"] if diario else args.csv,
+        message_template=diario.cabecalho["mensagem"] if diario else mensagem,
+        log_callback=saida.log,
+        progress_callback=saida.progresso,
+        on_finish_callback=lambda: None,
+        metrics_callback=saida.metricas if args.metricas else None,
+        ddd_padrao=args.ddd,
+        ddi_padrao=args.ddi,
+        usar_historico=usar_historico,
+        diario_retomar=diario,
+        limpar_cache_perfil=args.limpar_cache,
+        permitir_download_driver=not args.offline,
+        bloquear_midia=args.bloquear_midia,
+        limite_memoria_mb=args.limite_memoria,
+        reciclar_a_cada=args.reciclar_a_cada,
+        recursos_callback=saida.recursos if args.metricas else None,
+        headless=args.headless,
+        driver=driver,
+        pasta_relatorios=pasta,
+        **ritmo,
+    )
+
+    # Ctrl+C / SIGTERM = botão PARAR (o diário permite retomar depois)
+    def parar(signum, frame):
+        bot.stop()
+    signal.signal(signal.SIGINT, parar)
+    signal.signal(signal.SIGTERM, parar)
+
+    bot.start()
+    while bot.is_alive():
+        bot.join(0.5)  # join com timeout: o sinal é atendido na thread principal
+    saida.fechar()
+    # Campanha abortada por erro (WhatsApp não carregou, navegador caiu de vez...): saída 1
+    return 1 if bot.erro else 0
+
+
+def criar_parser():
+    from recursos import LIMITE_MEMORIA_MB, RECICLAR_A_CADA
+
+    parser = argparse.ArgumentParser(prog="wa_chatbot", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    def base(p, csv_obrigatorio=True):
+        p.add_argument("csv", nargs=None if csv_obrigatorio else "?", help="Lista de contatos")
+        p.add_argument("--mensagem", "-m", help="Texto da mensagem (aceita {nome}, spintax...)")
+        p.add_argument("--mensagem-arquivo", "-f", help="Arquivo UTF-8 com a mensagem")
+        p.add_argument("--ddd", default=DDD_PADRAO, help=f"DDD padrão (padrão: {DDD_PADRAO})")
+        p.add_argument("--ddi", default=DDI_PADRAO, help=f"DDI padrão (padrão: {DDI_PADRAO})")
+
+    base(sub.add_parser("validate", help="Valida CSV e mensagem sem abrir o navegador"))
+
+    p_preview = sub.add_parser("preview", help="Mostra a mensagem renderizada para os primeiros contatos")
+    base(p_preview)
+    p_preview.add_argument("-n", "--quantidade", type=int, default=3)
+    p_preview.add_argument("--seed", type=int, default=0, help="Semente do spintax (resultado reproduzível)")
+
+    p_run = sub.add_parser("run", help="Executa a campanha (mesmo robô da interface)")
+    base(p_run, csv_obrigatorio=False)
+    p_run.add_argument("--retomar", action="store_true", help="Continua a última campanha interrompida")
+    p_run.add_argument("--headless", action="store_true",
+                       help="Chrome sem janela (faça o login pelo QR antes, com a interface, no mesmo perfil)")
+    p_run.add_argument("--simular", action="store_true",
+                       help="Usa o driver_falso.DriverFalso (sem Chrome, sem envio real) para testar o fluxo; "
+                            f"sem histórico, relatório e diário em {PASTA_SIMULACAO}/")
+    p_run.add_argument("--log", help="Grava log e progresso neste arquivo em vez do stdout")
+    p_run.add_argument("--metricas", action="store_true", help="Mostra p50/p95 e memória do Chrome no log")
+    p_run.add_argument("--sem-historico", action="store_true", help="Não pula quem já recebeu/opt-out")
+    p_run.add_argument("--limpar-cache", action="store_true", help="Limpa o cache do perfil ao iniciar")
+    p_run.add_argument("--offline", action="store_true", help="Nunca baixar o chromedriver")
+    p_run.add_argument("--bloquear-midia", action="store_true", help="Não carregar imagens e mídias")
+    p_run.add_argument("--limite-memoria", type=int, default=LIMITE_MEMORIA_MB,
+                       help="Recicla o Chrome acima de N MB (0 = nunca)")
+    p_run.add_argument("--reciclar-a-cada", type=int, default=RECICLAR_A_CADA,
+                       help="Recicla o Chrome a cada N contatos (0 = nunca)")
+    return parser
+
+
+COMANDOS = {"validate": comando_validate, "preview": comando_preview, "run": comando_run}
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    return COMANDOS[args.comando](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())